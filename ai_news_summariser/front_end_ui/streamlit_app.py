@@ -98,6 +98,19 @@ def parse_with_news_genre(nodes_result):
     
     return grouped_articles
 
+def parse_article_summary(node_result):
+    """Parse a single article summary event into a news item dict."""
+    item = SummarisedNewsArticleModel(**node_result)
+    return {
+        "title": item.title if item.title else "",
+        "description": clean_html_and_entities(item.summary) if item.summary else "",
+        "url": item.url
+    }
+
+def parse_article_genre(node_result):
+    """Parse a single genre assigned article event into a news item dict carrying its genre."""
+    return {**parse_article_summary(node_result), "genre": node_result["genre"]}
+
 def parse_final_news_summary_with_genre(nodes_result):
     final_summary = nodes_result
     items = OutputGenreSummarisedResponseModel(**final_summary)
@@ -334,10 +347,23 @@ def stream_from_api(url, msg_queue, stop_event, params):
                 news_items = parse_news_summaries(node_result)
                 msg_queue.put({"type": "news_item_summary", "data": news_items})
             
+            elif node_name == "article_extracted":
+                msg_queue.put({"type": "article_extracted", "data": node_result})
+
+            elif node_name == "article_summarised":
+                msg_queue.put({"type": "article_summary", "data": parse_article_summary(node_result)})
+
+            elif node_name == "article_genre_assigned":
+                msg_queue.put({"type": "article_genre", "data": parse_article_genre(node_result)})
+
             elif node_name == "assign_genre":
                 genred_news_items = parse_with_news_genre(node_result)
                 msg_queue.put({"type": "genre_assigned", "data": genred_news_items})                
 
+            elif node_name == "final_genre_summary_item":
+                genre_summary = parse_final_news_summary_with_genre(node_result)
+                msg_queue.put({"type" : "final_summary_item", "data" : genre_summary})
+
             elif node_name == "final_genre_summary":
                 final_summary = parse_final_news_summary_with_genre(node_result)
                 msg_queue.put({"type" : "final_summary", "data" : final_summary})
@@ -503,11 +529,37 @@ def main():
                     st.session_state.stream_status = "assigning_genre"
                     should_rerun = True
                     
+                elif msg["type"] == "article_extracted":
+                    st.session_state.stream_status = "summarizing"
+
+                elif msg["type"] == "article_summary":
+                    # Summaries arrive one at a time, replace the search snippet of the same article
+                    news_items = [msg["data"] if item.get("url") == msg["data"]["url"] else item for item in st.session_state.news_items]
+                    if msg["data"] not in news_items:
+                        news_items.append(msg["data"])
+                    st.session_state.news_items = news_items
+                    st.session_state.stream_status = "summarizing"
+                    should_rerun = True
+
+                elif msg["type"] == "article_genre":
+                    genre_articles = st.session_state.genre_articles.setdefault(msg["data"]["genre"], [])
+                    if all(article["url"] != msg["data"]["url"] for article in genre_articles):
+                        genre_articles.append(msg["data"])
+                    st.session_state.stream_status = "assigning_genre"
+                    should_rerun = True
+
                 elif msg["type"] == "genre_assigned":
                     st.session_state.genre_articles = msg["data"]
                     st.session_state.stream_status = "assigning_genre"
                     should_rerun = True
                 
+                elif msg["type"] == "final_summary_item":
+                    # Genres arrive one at a time, merge them into what has been rendered so far
+                    received_summary = st.session_state.final_summary.root if st.session_state.final_summary else {}
+                    st.session_state.final_summary = OutputGenreSummarisedResponseModel({**received_summary, **msg["data"].root})
+                    st.session_state.stream_status = "final_summary"
+                    should_rerun = True
+
                 elif msg["type"] == "final_summary":
                     st.session_state.final_summary = msg["data"]
                     st.session_state.stream_status = "final_summary"
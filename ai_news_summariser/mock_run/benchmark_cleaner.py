@@ -0,0 +1,63 @@
+"""
+Benchmarks the page cleaner on the crawl and extract fixtures.
+
+Run from the ai_news_summariser folder:
+    python mock_run/benchmark_cleaner.py [rounds]
+
+Reports MB/s and per page latency of the legacy two pass cleaner and of clean_page,
+for the fixture pages as stored (markdown) and wrapped in HTML to exercise the parser.
+"""
+from pathlib import Path
+import json
+import statistics
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from news_agent_flow.tools.clean_html_links import clean_web_content, clean_html_and_entities, clean_page, _HTML_PARSER
+
+fixture_files = ["crawl_result_from_api.json", "extract_results.json"]
+
+def load_pages() -> list[str]:
+    pages = []
+    for fixture_file in fixture_files:
+        with open(Path(__file__).parent / "json_files" / fixture_file, "r", encoding="utf-8") as f:
+            for crawl in json.load(f):
+                pages.extend(item["raw_content"] for item in crawl.get("results", []) if item.get("raw_content"))
+    return pages
+
+def legacy_clean(raw_content: str) -> str:
+    return clean_web_content(clean_html_and_entities(raw_content))
+
+def run(name: str, cleaner, pages: list[str], rounds: int):
+    latencies = []
+    started_at = time.perf_counter()
+    for _ in range(rounds):
+        for page in pages:
+            page_started_at = time.perf_counter()
+            cleaner(page)
+            latencies.append(time.perf_counter() - page_started_at)
+    elapsed = time.perf_counter() - started_at
+
+    megabytes = rounds * sum(len(page.encode("utf-8")) for page in pages) / 1_000_000
+    latencies.sort()
+    print(f"{name:<28} {megabytes / elapsed:8.2f} MB/s   "
+          f"p50 {statistics.median(latencies) * 1000:7.2f} ms   "
+          f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:7.2f} ms   "
+          f"max {latencies[-1] * 1000:7.2f} ms")
+
+if __name__ == "__main__":
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    pages = load_pages()
+    html_pages = [f"<html><head><style>p {{}}</style></head><body><p>{page}</p></body></html>" for page in pages]
+    total_kb = sum(len(page.encode("utf-8")) for page in pages) / 1000
+    print(f"{len(pages)} pages, {total_kb:.0f} KB, {rounds} rounds, parser backend {_HTML_PARSER}")
+
+    identical = sum(legacy_clean(page) == clean_page(page) for page in pages)
+    print(f"clean_page output identical to legacy on {identical} of {len(pages)} markdown pages")
+
+    run("legacy (markdown)", legacy_clean, pages, rounds)
+    run("clean_page (markdown)", clean_page, pages, rounds)
+    run("legacy (html)", legacy_clean, html_pages, rounds)
+    run("clean_page (html)", clean_page, html_pages, rounds)
@@ -3,8 +3,12 @@ from crewai import LLM
 import os
 from dotenv import load_dotenv
 import json
+import asyncio
+from typing import Callable, Optional
 
-from news_agent_flow.llm import LLMFactory
+from news_agent_flow.llm import LLMFactory, LLMRegistry
+from news_agent_flow.cache import LLMCache, fingerprint
+from news_agent_flow.configs import AppConfigModel
 
 from news_agent_flow.models import GenreSumarisedModel, OutputGenreSummarisedResponseModel
 
@@ -12,13 +16,27 @@ from news_agent_flow.prompts import summariser_task_prompts, summariser_agent_pr
 
 load_dotenv()
 
+app_config = AppConfigModel.from_json_file("news_agent_flow/configs/agent_config.json")
+
 class NewsSummariser:
     llm: LLM
 
     def __init__(self):
         self.llm = LLMFactory.build_crew_llm()
 
-    def news_summariser(self, news_content, genre):
+    async def news_summariser(self, news_content, genre):
+        inputs = {
+            "genre": genre,
+            "joined_news": news_content
+            }
+
+        # Identical genre inputs are answered from the LLM cache without building the crew
+        return await LLMCache.get_instance().aget_or_compute(LLMRegistry.client_key("crew_ai"),
+                                                             fingerprint(summariser_agent_prompts, summariser_task_prompts),
+                                                             inputs,
+                                                             lambda: self._kickoff_summariser_crew(inputs))
+
+    async def _kickoff_summariser_crew(self, inputs) -> str:
 
         summariser_agent = Agent(
             role="News Summariser",
@@ -42,12 +60,9 @@ class NewsSummariser:
             verbose=False
         )
 
-        result = crew.kickoff(inputs={
-            "genre": genre,
-            "joined_news": news_content
-            })
+        result = await crew.kickoff_async(inputs=inputs)
         
-        return result
+        return str(result)
     
     def combine_summary(self, summaries) -> str:
         if isinstance(summaries, str):
@@ -57,15 +72,60 @@ class NewsSummariser:
         else:
             return ""
         
-    def summarise_genre_news(self, news_genre_summary: GenreSumarisedModel) -> OutputGenreSummarisedResponseModel:
-        serializeable = {}
-        for genre, summaries in news_genre_summary.categories.items():
+    async def _map_reduce_summary(self, genre, summaries: list, map_semaphore: asyncio.Semaphore) -> str:
+        """
+        Summarises the chunks of a large genre in parallel and reduces the chunk summaries the same way
+        until at most chunk_size are left for one final call, so no prompt carries more than chunk_size items.
+        Chunks follow the article order, a new article only misses the LLM cache for the last chunk
+        """
+        chunk_size = max(2, app_config.final_summary_chunk_size)
+
+        async def _summarise_chunk(chunk: list[str]) -> str:
+            async with map_semaphore:
+                return str(await self.news_summariser(". ".join(chunk), genre))
+
+        texts = [summary.summary for summary in summaries]
+        while len(texts) > chunk_size:
+            texts = await asyncio.gather(*[_summarise_chunk(texts[i:i + chunk_size]) for i in range(0, len(texts), chunk_size)])
+        return await self.news_summariser(". ".join(texts), genre)
+
+    async def summarise_single_genre(self, genre, summaries, map_semaphore: Optional[asyncio.Semaphore] = None) -> dict:
+        map_reduce_threshold = app_config.final_summary_map_reduce_threshold
+        if isinstance(summaries, list) and len(summaries) == 1:
+            # A single article genre has nothing to merge, its summary is the genre summary
+            summary_result = summaries[0].summary
+        elif map_reduce_threshold and isinstance(summaries, list) and len(summaries) > map_reduce_threshold:
+            summary_result = await self._map_reduce_summary(genre, summaries,
+                                                            map_semaphore or asyncio.Semaphore(max(1, app_config.final_summary_map_parallel)))
+        else:
             full_summary = self.combine_summary(summaries=summaries)
-            summary_result = self.news_summariser(full_summary, genre)
+            summary_result = await self.news_summariser(full_summary, genre)
 
-            serializeable[genre] = {"final_summary" : str(summary_result), 
-                                    "all_summary" : [summary.model_dump() for summary in summaries]}
-        
+        return {"final_summary" : str(summary_result), 
+                "all_summary" : [summary.model_dump() for summary in summaries]}
+
+    async def summarise_genre_news(self, news_genre_summary: GenreSumarisedModel,
+                                   on_genre_summary: Optional[Callable[[str, dict], None]] = None) -> OutputGenreSummarisedResponseModel:
+        """
+        Summarises the genres concurrently. on_genre_summary is called with each genre as soon as its summary is ready
+        """
+        semaphore = asyncio.Semaphore(max(1, app_config.final_summary_parallel))
+        # Chunks of large genres are bounded on their own, a genre holding a slot never waits on the genre slots
+        map_semaphore = asyncio.Semaphore(max(1, app_config.final_summary_map_parallel))
+
+        async def _summarise(genre, summaries):
+            async with semaphore:
+                return genre, await self.summarise_single_genre(genre, summaries, map_semaphore)
+
+        serializeable = {}
+        for next_done in asyncio.as_completed([_summarise(genre, summaries) for genre, summaries in news_genre_summary.categories.items()]):
+            genre, genre_summary = await next_done
+            serializeable[genre] = genre_summary
+            if on_genre_summary:
+                on_genre_summary(genre, genre_summary)
+
+        # Keep the genre order of the input irrespective of completion order
+        serializeable = {genre: serializeable[genre] for genre in news_genre_summary.categories}
         result = OutputGenreSummarisedResponseModel(**serializeable)
         return result
 
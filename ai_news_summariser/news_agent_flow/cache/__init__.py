@@ -0,0 +1,5 @@
+from .llm_cache import LLMCache, CachedChain, fingerprint
+from .article_store import ArticleStore
+
+__all__ = ["LLMCache", "CachedChain", "fingerprint",
+           "ArticleStore"]
@@ -0,0 +1,109 @@
+from news_agent_flow.configs import AppConfigModel
+
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+import asyncio
+import threading
+import time
+
+app_config = AppConfigModel.from_json_file("news_agent_flow/configs/agent_config.json")
+
+
+class ArticleStore:
+    """
+    Process wide store of per URL article data (cleaned content, summaries) shared by every query.
+
+    Values are served while younger than freshness_seconds. A URL that another request is already
+    fetching is not fetched again, the second request awaits the first one's answer instead.
+    The store lives on the server event loop, its bookkeeping never awaits so it needs no lock.
+    """
+    _instance: Optional["ArticleStore"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, freshness_seconds: int, max_entries: int):
+        self.freshness_seconds = freshness_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.shared_in_flight = 0
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[Any, float]]" = OrderedDict()
+        self._in_flight: Dict[Tuple[str, str], asyncio.Future] = {}
+
+    @classmethod
+    def get_instance(cls) -> "ArticleStore":
+        with cls._instance_lock:
+            if cls._instance is None:
+                store_config = app_config.article_store
+                cls._instance = ArticleStore(freshness_seconds=store_config.freshness_seconds,
+                                             max_entries=store_config.max_entries)
+            return cls._instance
+
+    def _get_fresh(self, key: Tuple[str, str]):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, stored_at = entry
+        if time.time() - stored_at > self.freshness_seconds:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _put(self, key: Tuple[str, str], value):
+        self._entries[key] = (value, time.time())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def fetch_many(self, kind: str, urls: Iterable[str],
+                         fetch: Callable[[List[str]], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Returns the value of every URL that could be resolved, awaiting fetch only for URLs that are
+        neither fresh in the store nor being fetched by another request. fetch returns a URL keyed dict.
+        """
+        results = {}
+        owned = []
+        waiting: Dict[str, asyncio.Future] = {}
+        loop = asyncio.get_running_loop()
+
+        for url in dict.fromkeys(urls):
+            key = (kind, url)
+            value = self._get_fresh(key)
+            if value is not None:
+                self.hits += 1
+                results[url] = value
+            elif key in self._in_flight:
+                self.shared_in_flight += 1
+                waiting[url] = self._in_flight[key]
+            else:
+                self.misses += 1
+                self._in_flight[key] = loop.create_future()
+                owned.append(url)
+
+        fetched = {}
+        try:
+            if owned:
+                fetched = await fetch(owned) or {}
+        finally:
+            # Always release the claimed URLs, waiters get None for anything that was not fetched
+            for url in owned:
+                value = fetched.get(url)
+                if value is not None:
+                    self._put((kind, url), value)
+                self._in_flight.pop((kind, url)).set_result(value)
+
+        results.update({url: fetched[url] for url in owned if fetched.get(url) is not None})
+        for url, future in waiting.items():
+            value = await asyncio.shield(future)
+            if value is not None:
+                results[url] = value
+
+        return results
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "shared_in_flight": self.shared_in_flight,
+            "entries": len(self._entries)
+        }
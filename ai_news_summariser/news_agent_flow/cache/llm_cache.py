@@ -0,0 +1,188 @@
+from news_agent_flow.configs import AppConfigModel
+
+from typing import Any, Awaitable, Callable, Optional
+from pathlib import Path
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+app_config = AppConfigModel.from_json_file("news_agent_flow/configs/agent_config.json")
+
+_MISSING = object()
+
+def fingerprint(*parts) -> str:
+    """
+    Stable sha256 of anything json serialisable (prompt templates, prompt dicts, inputs)
+    """
+    payload = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    Disk backed cache of LLM answers.
+
+    Entries are keyed by the model, a fingerprint of the prompt template and a hash of the input content,
+    expire after ttl_seconds and the least recently used ones are evicted beyond max_entries.
+    """
+    _instance: Optional["LLMCache"] = None
+    _instance_lock = threading.Lock()
+
+    _evict_every = 50
+
+    def __init__(self, path: str, ttl_seconds: int, max_entries: int, is_active: bool = True):
+        self.is_active = is_active
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+        if is_active:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("""CREATE TABLE IF NOT EXISTS llm_cache (
+                                    key TEXT PRIMARY KEY,
+                                    value TEXT NOT NULL,
+                                    expires_at REAL NOT NULL,
+                                    last_access REAL NOT NULL)""")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access ON llm_cache(last_access)")
+            self._conn.commit()
+            self._evict()
+
+    @classmethod
+    def get_instance(cls) -> "LLMCache":
+        with cls._instance_lock:
+            if cls._instance is None:
+                cache_config = app_config.llm_cache
+                cls._instance = LLMCache(path=cache_config.path,
+                                         ttl_seconds=cache_config.ttl_seconds,
+                                         max_entries=cache_config.max_entries,
+                                         is_active=cache_config.is_active)
+            return cls._instance
+
+    @staticmethod
+    def make_key(model, template_fingerprint: str, inputs) -> str:
+        return fingerprint(model, template_fingerprint, fingerprint(inputs))
+
+    def get(self, key: str):
+        if not self.is_active:
+            return _MISSING
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None or row[1] <= now:
+                self.misses += 1
+                return _MISSING
+            self._conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, value):
+        if not self.is_active:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO llm_cache (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                               (key, json.dumps(value, ensure_ascii=False), now + self.ttl_seconds, now))
+            self._conn.commit()
+            self._writes += 1
+            should_evict = self._writes % self._evict_every == 0
+        if should_evict:
+            self._evict()
+
+    def _evict(self):
+        with self._lock:
+            expired = self._conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (time.time(),)).rowcount
+            overflow = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                self._conn.execute("""DELETE FROM llm_cache WHERE key IN
+                                      (SELECT key FROM llm_cache ORDER BY last_access ASC LIMIT ?)""", (overflow,))
+            self._conn.commit()
+            self.evictions += max(expired, 0) + max(overflow, 0)
+
+    def get_or_compute(self, model, template_fingerprint: str, inputs, compute: Callable[[], Any],
+                       serialize: Callable[[Any], Any] = lambda x: x,
+                       deserialize: Callable[[Any], Any] = lambda x: x):
+        """
+        Returns the cached answer for the model, template and inputs, calling compute and storing its answer on a miss
+        """
+        key = self.make_key(model, template_fingerprint, inputs)
+        cached = self.get(key)
+        if cached is not _MISSING:
+            return deserialize(cached)
+
+        result = compute()
+        try:
+            self.set(key, serialize(result))
+        except Exception as e:
+            print(f"Exception while caching the LLM result {str(e)}")
+        return result
+
+    async def aget_or_compute(self, model, template_fingerprint: str, inputs, compute: Callable[[], Awaitable[Any]],
+                              serialize: Callable[[Any], Any] = lambda x: x,
+                              deserialize: Callable[[Any], Any] = lambda x: x):
+        """
+        Async get_or_compute, the disk reads and writes run in a worker thread to keep the event loop free
+        """
+        key = self.make_key(model, template_fingerprint, inputs)
+        cached = await asyncio.to_thread(self.get, key)
+        if cached is not _MISSING:
+            return deserialize(cached)
+
+        result = await compute()
+        try:
+            await asyncio.to_thread(self.set, key, serialize(result))
+        except Exception as e:
+            print(f"Exception while caching the LLM result {str(e)}")
+        return result
+
+    def stats(self) -> dict:
+        entries = 0
+        if self.is_active:
+            with self._lock:
+                entries = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits / total) if total else 0.0,
+            "evictions": self.evictions,
+            "entries": entries
+        }
+
+
+class CachedChain:
+    """
+    Wraps a langchain runnable so invoke is answered from the LLMCache when the same model, template and input were seen
+    """
+    def __init__(self, chain, model, template, output_model=None):
+        self.chain = chain
+        self.model = model
+        self.template_fingerprint = fingerprint(template)
+        self.output_model = output_model
+
+    def _serialize(self, result):
+        return result.model_dump() if self.output_model else result
+
+    def _deserialize(self, cached):
+        return self.output_model.model_validate(cached) if self.output_model else cached
+
+    def invoke(self, inputs, *args, **kwargs):
+        return LLMCache.get_instance().get_or_compute(self.model, self.template_fingerprint, inputs,
+                                                      lambda: self.chain.invoke(inputs, *args, **kwargs),
+                                                      serialize=self._serialize, deserialize=self._deserialize)
+
+    async def ainvoke(self, inputs, *args, **kwargs):
+        return await LLMCache.get_instance().aget_or_compute(self.model, self.template_fingerprint, inputs,
+                                                             lambda: self.chain.ainvoke(inputs, *args, **kwargs),
+                                                             serialize=self._serialize, deserialize=self._deserialize)
@@ -27,23 +27,89 @@ class LLMComponentConfigModel(BaseModel):
     name: str
     model: str
     is_active: bool
+    batch_size: int = 1
+    max_input_tokens: int = 3000
+    tokenizer: str = "cl100k_base"
+    extractive_compression: bool = True
+
+class RateLimitModel(BaseModel):
+    requests_per_second: float = 5
+    burst: int = 10
+    min_parallel: int = 1
+    max_parallel: int = 16
+    target_latency_ms: int = 15000
+
+class ResilienceModel(BaseModel):
+    url_timeout_ms: int = 20000
+    stage_deadline_ms: int = 45000
+    retries: int = 2
+    retry_backoff_ms: int = 500
+    hedge_after_ms: int = 0
 
 class WebCrawl(BaseModel):
     tools: List[SimpleComponentConfigModel]
     parallel_executor: int
+    batch_size: int = 5
+    batch_window_ms: int = 50
+    rate_limit: RateLimitModel = RateLimitModel()
+    resilience: ResilienceModel = ResilienceModel()
+
+class Summarizer(BaseModel):
+    tools: List[LLMComponentConfigModel]
+    parallel_executor: int = 1
 
 class GenreModel(BaseModel):
     assign_genre: List[SimpleComponentConfigModel]
     genre_list: List[str]
+    batch_size: int = 20
+    parallel_executor: int = 1
+    local_model: str = "sentence-transformers/all-MiniLM-L6-v2"
+    confidence_threshold: float = 0.5
+    local_fallback: str = "langchain_batch"
+    unmatched_genre: str = "Other"
+
+class FinalSummaryModel(BaseModel):
+    parallel_executor: int = 1
+    map_reduce_threshold: int = 0
+    chunk_size: int = 8
+    map_parallel: int = 4
+
+class PipelineModel(BaseModel):
+    flow: List[SimpleComponentConfigModel] = []
+    parallel_executor: int = 1
+    batch_size: int = 20
+    batch_window_ms: int = 100
+
+class LLMCacheModel(BaseModel):
+    is_active: bool = False
+    path: str = "news_agent_flow/cache/llm_cache.sqlite3"
+    ttl_seconds: int = 86400
+    max_entries: int = 10000
+
+class ArticleStoreModel(BaseModel):
+    freshness_seconds: int = 3600
+    max_entries: int = 2000
+
+class NearDuplicateModel(BaseModel):
+    is_active: bool = False
+    threshold: float = 0.8
+    num_perm: int = 128
+    shingle_size: int = 5
 
 class AppConfigModel(BaseModel):
     is_mock: bool
+    mock_delay_seconds: float = 0
     log_expiry: Optional[LogExpiryModel] = None
 
     _llm: List[LLMConfigModel] = PrivateAttr()
     _web_crawl: WebCrawl = PrivateAttr()
-    _summarizer: List[LLMComponentConfigModel] = PrivateAttr()
+    _summarizer: Summarizer = PrivateAttr()
     _genre: GenreModel = PrivateAttr()
+    _final_summary: FinalSummaryModel = PrivateAttr()
+    _pipeline: PipelineModel = PrivateAttr()
+    _llm_cache: LLMCacheModel = PrivateAttr()
+    _article_store: ArticleStoreModel = PrivateAttr()
+    _near_duplicate: NearDuplicateModel = PrivateAttr()
 
     @classmethod
     def from_json_file(cls, file_path: str) -> "AppConfigModel":
@@ -58,12 +124,18 @@ class AppConfigModel(BaseModel):
 
         instance = cls(
                 is_mock=data.get("is_mock", True),
+                mock_delay_seconds=data.get("mock_delay_seconds", 0),
                 log_expiry=log_expiry
             )
         instance._llm = [LLMConfigModel(**llm) for llm in data.get("llm", [])]
         instance._web_crawl = WebCrawl(**data.get("web_crawl", {}))
-        instance._summarizer = [LLMComponentConfigModel(**item) for item in data.get("summarizer", [])]
+        instance._summarizer = Summarizer(**data.get("summarizer", {}))
         instance._genre = GenreModel(**data.get("genre", {}))
+        instance._final_summary = FinalSummaryModel(**data.get("final_summary", {}))
+        instance._pipeline = PipelineModel(**data.get("pipeline", {}))
+        instance._llm_cache = LLMCacheModel(**data.get("llm_cache", {}))
+        instance._article_store = ArticleStoreModel(**data.get("article_store", {}))
+        instance._near_duplicate = NearDuplicateModel(**data.get("near_duplicate", {}))
         return instance
 
     def _get_active_or_first(self, items: List[BaseModel]) -> Optional[BaseModel]:
@@ -87,9 +159,29 @@ class AppConfigModel(BaseModel):
     def web_crawl_parallel(self) -> Optional[int]:
         return self._web_crawl.parallel_executor
 
+    @property
+    def web_crawl_rate_limit(self) -> RateLimitModel:
+        return self._web_crawl.rate_limit
+
+    @property
+    def web_crawl_resilience(self) -> ResilienceModel:
+        return self._web_crawl.resilience
+
+    @property
+    def web_crawl_batch_size(self) -> int:
+        return self._web_crawl.batch_size
+
+    @property
+    def web_crawl_batch_window_seconds(self) -> float:
+        return self._web_crawl.batch_window_ms / 1000
+
     @property
     def active_summarizer(self) -> Optional[LLMComponentConfigModel]:
-        return self._get_active_or_first(self._summarizer)
+        return self._get_active_or_first(self._summarizer.tools)
+
+    @property
+    def summarizer_parallel(self) -> int:
+        return self._summarizer.parallel_executor
     
     @property
     def genre_list(self) -> List[str]:
@@ -97,4 +189,73 @@ class AppConfigModel(BaseModel):
 
     @property
     def active_assign_genre(self) -> Optional[SimpleComponentConfigModel]:
-        return self._get_active_or_first(self._genre.assign_genre)
\ No newline at end of file
+        return self._get_active_or_first(self._genre.assign_genre)
+
+    @property
+    def genre_batch_size(self) -> int:
+        return self._genre.batch_size
+
+    @property
+    def genre_parallel(self) -> int:
+        return self._genre.parallel_executor
+
+    @property
+    def genre_local_model(self) -> str:
+        return self._genre.local_model
+
+    @property
+    def genre_confidence_threshold(self) -> float:
+        return self._genre.confidence_threshold
+
+    @property
+    def genre_local_fallback(self) -> str:
+        return self._genre.local_fallback
+
+    @property
+    def genre_unmatched(self) -> str:
+        return self._genre.unmatched_genre
+
+    @property
+    def final_summary_parallel(self) -> int:
+        return self._final_summary.parallel_executor
+
+    @property
+    def final_summary_map_reduce_threshold(self) -> int:
+        return self._final_summary.map_reduce_threshold
+
+    @property
+    def final_summary_chunk_size(self) -> int:
+        return self._final_summary.chunk_size
+
+    @property
+    def final_summary_map_parallel(self) -> int:
+        return self._final_summary.map_parallel
+
+    @property
+    def active_pipeline(self) -> Optional[SimpleComponentConfigModel]:
+        return self._get_active_or_first(self._pipeline.flow)
+
+    @property
+    def pipeline_parallel(self) -> int:
+        return self._pipeline.parallel_executor
+
+    @property
+    def pipeline_batch_size(self) -> int:
+        # At most parallel_executor articles are in flight, a larger batch could never fill and would always wait the window
+        return max(1, min(self._pipeline.batch_size, self._pipeline.parallel_executor))
+
+    @property
+    def pipeline_batch_window_seconds(self) -> float:
+        return self._pipeline.batch_window_ms / 1000
+
+    @property
+    def llm_cache(self) -> LLMCacheModel:
+        return self._llm_cache
+
+    @property
+    def article_store(self) -> ArticleStoreModel:
+        return self._article_store
+
+    @property
+    def near_duplicate(self) -> NearDuplicateModel:
+        return self._near_duplicate
\ No newline at end of file
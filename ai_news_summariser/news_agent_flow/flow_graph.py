@@ -1,6 +1,8 @@
 from langgraph.graph import StateGraph, START, END
+from langgraph.types import Send
 from news_agent_flow.models import NewsAgentState
 from news_agent_flow.nodes import search_web_for_news, crawl_news_content, assign_genre, final_genre_summary, summarise_news
+from news_agent_flow.nodes import process_article, join_article_summaries, join_article_genres, dedupe_news_content, dedupe_search_results
 from news_agent_flow.utils import cleanup_old_logs
 from news_agent_flow.configs import AppConfigModel
 
@@ -17,24 +19,79 @@ def create_news_agent_with_final_summary_flow():
     # Run cleanup before executing
     cleanup_old_logs(days=app_config.log_expiry.days, hours=app_config.log_expiry.hours, minutes=app_config.log_expiry.minutes)
 
+    active_pipeline = app_config.active_pipeline
+    match active_pipeline.name if active_pipeline else "staged":
+        case "fan_out":
+            return create_news_agent_fan_out_flow()
+        case _:
+            return create_news_agent_staged_flow()
+
+def create_news_agent_staged_flow():
+    """
+    Runs every stage over all the articles before the next stage starts
+    """
     graph = StateGraph(state_schema=NewsAgentState)
 
     graph.add_node("search_the_web", search_web_for_news)
     graph.add_node("crawl_the_news", crawl_news_content)
+    graph.add_node("dedupe_the_news", dedupe_news_content)
     graph.add_node("summarise_the_news", summarise_news)
     graph.add_node("assign_genre", assign_genre)
     graph.add_node("final_genre_summary", final_genre_summary)
 
+    # Near duplicate stories are collapsed before the first LLM stage
+    after_crawl = "dedupe_the_news" if app_config.near_duplicate.is_active else "summarise_the_news"
+
     graph.add_edge(START, "search_the_web")
     # Router nodes
     graph.add_conditional_edges("search_the_web",  lambda s: END if s.get("has_error") else "crawl_the_news")
-    graph.add_conditional_edges("crawl_the_news", lambda s: END if s.get("has_error") else "summarise_the_news")
+    graph.add_conditional_edges("crawl_the_news", lambda s: END if s.get("has_error") else after_crawl)
+    graph.add_edge("dedupe_the_news", "summarise_the_news")
     graph.add_conditional_edges("summarise_the_news", lambda s: END if s.get("has_error") else "assign_genre")
     graph.add_conditional_edges("assign_genre", lambda s: END if s.get("has_error") else "final_genre_summary")
     graph.add_edge("final_genre_summary", END)
 
     return graph.compile()
 
+def _route_articles(state: NewsAgentState):
+    if state.get("has_error"):
+        return END
+    # One independent extract, summarise and classify run per search result, near duplicates only send their representative
+    source_urls = state.get("source_urls")
+    return [Send("process_article", {"query": state["query"], "article": item}) for item in state["results_search"].results
+            if source_urls is None or item.url in source_urls] \
+           or "summarise_the_news"
+
+def create_news_agent_fan_out_flow():
+    """
+    Fans every search result out through extract, clean, summarise and classify on its own.
+    The articles only join before the genre summary, under the summarise_the_news and assign_genre nodes
+    """
+    graph = StateGraph(state_schema=NewsAgentState)
+
+    graph.add_node("search_the_web", search_web_for_news)
+    graph.add_node("dedupe_the_news", dedupe_search_results)
+    graph.add_node("process_article", process_article)
+    graph.add_node("summarise_the_news", join_article_summaries)
+    graph.add_node("assign_genre", join_article_genres)
+    graph.add_node("final_genre_summary", final_genre_summary)
+
+    graph.add_edge(START, "search_the_web")
+    # Router nodes
+    if app_config.near_duplicate.is_active:
+        # Near duplicate search results are collapsed before any of them is extracted
+        graph.add_conditional_edges("search_the_web", lambda s: END if s.get("has_error") else "dedupe_the_news")
+        graph.add_conditional_edges("dedupe_the_news", _route_articles, ["process_article", "summarise_the_news", END])
+    else:
+        graph.add_conditional_edges("search_the_web", _route_articles, ["process_article", "summarise_the_news", END])
+    graph.add_edge("process_article", "summarise_the_news")
+    graph.add_conditional_edges("summarise_the_news", lambda s: END if s.get("has_error") else "assign_genre")
+    graph.add_conditional_edges("assign_genre", lambda s: END if s.get("has_error") else "final_genre_summary")
+    graph.add_edge("final_genre_summary", END)
+
+    # parallel_executor bounds how many articles are in flight at once
+    return graph.compile().with_config(max_concurrency=max(1, app_config.pipeline_parallel))
+
 def create_news_agent_with_news_summary_flow():
     """
     Fetches the News from web.
@@ -1,7 +1,10 @@
 from .gemini_llm import GeminiCrewLLM, GeminiLangchainLLM
 from .openai_llm import OpenAICrewLLM, OpenAILangchainLLM
+from .llm_registry import LLMRegistry
 from .llm_factory import LLMFactory
+from .local_model_registry import LocalModelRegistry
 
 __all__ = ["GeminiCrewLLM", "GeminiLangchainLLM",
            "OpenAICrewLLM", "OpenAILangchainLLM",
-           "LLMFactory"]
\ No newline at end of file
+           "LLMRegistry", "LLMFactory",
+           "LocalModelRegistry"]
\ No newline at end of file
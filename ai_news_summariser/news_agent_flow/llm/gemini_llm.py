@@ -1,5 +1,6 @@
 from crewai import LLM
 from news_agent_flow.configs import AppConfigModel
+from news_agent_flow.configs.agent_config import LLMConfigModel
 from langchain_google_genai import ChatGoogleGenerativeAI
 
 import os
@@ -15,10 +16,11 @@ class GeminiCrewLLM:
     """
     llm: LLM
 
-    def __init__(self):
+    def __init__(self, llm_config: LLMConfigModel = None):
+        llm_config = llm_config or _gemini_llm
         self.llm = LLM(
-            model=f"{_gemini_llm.model.crew_ai}",
-            temperature=_gemini_llm.temprature,
+            model=f"{llm_config.model.crew_ai}",
+            temperature=llm_config.temprature,
             api_key=os.getenv("GOOGLE_API_KEY")  # or correct param name
         )
 
@@ -36,10 +38,11 @@ class GeminiLangchainLLM:
     """
     llm: ChatGoogleGenerativeAI
 
-    def __init__(self):
+    def __init__(self, llm_config: LLMConfigModel = None):
+        llm_config = llm_config or _gemini_llm
         self.llm = ChatGoogleGenerativeAI(
-            model=f"{_gemini_llm.model.langchain}",
-            temperature=_gemini_llm.temprature,
+            model=f"{llm_config.model.langchain}",
+            temperature=llm_config.temprature,
             api_key=os.getenv("GOOGLE_API_KEY")
             )
 
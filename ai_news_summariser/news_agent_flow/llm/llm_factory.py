@@ -1,25 +1,32 @@
 from news_agent_flow.llm import GeminiCrewLLM, OpenAICrewLLM, OpenAILangchainLLM, GeminiLangchainLLM
-from news_agent_flow.configs import AppConfigModel
-
-_active_llm = AppConfigModel.from_json_file("news_agent_flow/configs/agent_config.json").active_llm
+from news_agent_flow.llm.llm_registry import LLMRegistry
+from news_agent_flow.configs.agent_config import LLMConfigModel
 
 class LLMFactory:
-    
+
     @staticmethod
     def build_crew_llm():
-        
-        if _active_llm.name == OpenAICrewLLM.llm_model():
-            return OpenAICrewLLM().get_llm()
-        elif _active_llm.name == GeminiCrewLLM.llm_model():
-            return GeminiCrewLLM().get_llm()
+        return LLMRegistry.get_client("crew_ai", LLMFactory._create_crew_llm)
+
+    @staticmethod
+    def build_langchain_llm():
+        return LLMRegistry.get_client("langchain", LLMFactory._create_langchain_llm)
+
+    @staticmethod
+    def _create_crew_llm(active_llm: LLMConfigModel):
+
+        if active_llm.name == OpenAICrewLLM.llm_model():
+            return OpenAICrewLLM(active_llm).get_llm()
+        elif active_llm.name == GeminiCrewLLM.llm_model():
+            return GeminiCrewLLM(active_llm).get_llm()
         else:
             return GeminiCrewLLM().get_llm()
-        
+
     @staticmethod
-    def build_langchain_llm():
-        if _active_llm.name == OpenAILangchainLLM.llm_model():
-            return OpenAILangchainLLM().get_llm()
-        elif _active_llm.name == GeminiCrewLLM.llm_model():
-            return GeminiLangchainLLM().get_llm()
+    def _create_langchain_llm(active_llm: LLMConfigModel):
+        if active_llm.name == OpenAILangchainLLM.llm_model():
+            return OpenAILangchainLLM(active_llm).get_llm()
+        elif active_llm.name == GeminiCrewLLM.llm_model():
+            return GeminiLangchainLLM(active_llm).get_llm()
         else:
             return GeminiLangchainLLM().get_llm()
\ No newline at end of file
@@ -0,0 +1,71 @@
+from news_agent_flow.configs import AppConfigModel
+from news_agent_flow.configs.agent_config import LLMConfigModel
+
+from typing import Any, Callable, Dict, Tuple
+import os
+import threading
+
+_config_path = "news_agent_flow/configs/agent_config.json"
+
+class LLMRegistry:
+    """
+    Process wide registry of LLM clients and prebuilt chains.
+
+    Clients are keyed by framework, provider, model and temperature so every caller shares one client
+    and its HTTP connection pool. Chains are keyed by name and the client key they were built with.
+    Every entry is dropped when the agent config file changes on disk.
+    """
+    _clients: Dict[Tuple, Any] = {}
+    _chains: Dict[Tuple, Any] = {}
+    _lock = threading.RLock()
+    _config_mtime: float | None = None
+    _active_llm: LLMConfigModel | None = None
+
+    @classmethod
+    def _refresh_config(cls):
+        mtime = os.path.getmtime(_config_path)
+        if mtime != cls._config_mtime:
+            cls._active_llm = AppConfigModel.from_json_file(_config_path).active_llm
+            cls._clients.clear()
+            cls._chains.clear()
+            cls._config_mtime = mtime
+
+    @classmethod
+    def active_llm(cls) -> LLMConfigModel:
+        with cls._lock:
+            cls._refresh_config()
+            return cls._active_llm
+
+    @classmethod
+    def client_key(cls, framework: str) -> Tuple:
+        active_llm = cls.active_llm()
+        return (framework, active_llm.name, getattr(active_llm.model, framework), active_llm.temprature)
+
+    @classmethod
+    def get_client(cls, framework: str, builder: Callable[[LLMConfigModel], Any]) -> Any:
+        """
+        Returns the shared client of the active LLM for the framework, building it once with builder
+        """
+        with cls._lock:
+            key = cls.client_key(framework)
+            if key not in cls._clients:
+                cls._clients[key] = builder(cls._active_llm)
+            return cls._clients[key]
+
+    @classmethod
+    def get_chain(cls, name: str, builder: Callable[[], Any], framework: str = "langchain") -> Any:
+        """
+        Returns the shared chain registered under name, building it once with builder
+        """
+        with cls._lock:
+            key = (name, *cls.client_key(framework))
+            if key not in cls._chains:
+                cls._chains[key] = builder()
+            return cls._chains[key]
+
+    @classmethod
+    def invalidate(cls):
+        with cls._lock:
+            cls._clients.clear()
+            cls._chains.clear()
+            cls._config_mtime = None
@@ -0,0 +1,50 @@
+from transformers import pipeline
+
+from typing import Any, Callable, Dict, Tuple
+import threading
+
+class LocalModelRegistry:
+    """
+    Keeps local transformers pipelines resident in the process.
+
+    A pipeline is loaded once per (task, model) on first use and reused by every request after that.
+    Inference on a pipeline is serialised, since a CPU node gains nothing from running the same model twice at once.
+    """
+    _pipelines: Dict[Tuple[str, str], Tuple[Any, threading.Lock]] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def _get_entry(cls, task: str, model: str) -> Tuple[Any, threading.Lock]:
+        key = (task, model)
+        with cls._lock:
+            if key not in cls._pipelines:
+                print(f"Loading local model {model} for {task}")
+                cls._pipelines[key] = (pipeline(task, model=model), threading.Lock())
+            return cls._pipelines[key]
+
+    @classmethod
+    def get_pipeline(cls, task: str, model: str):
+        return cls._get_entry(task, model)[0]
+
+    @classmethod
+    def run(cls, task: str, model: str, inputs, **kwargs):
+        """
+        Runs the inputs through the resident pipeline as a single call, pass a list and batch_size to batch them
+        """
+        local_pipeline, inference_lock = cls._get_entry(task, model)
+        with inference_lock:
+            return local_pipeline(inputs, **kwargs)
+
+    @classmethod
+    def run_with(cls, task: str, model: str, fn: Callable[[Any], Any]):
+        """
+        Calls fn with the resident pipeline under its inference lock, for inference the pipeline call does not cover
+        """
+        local_pipeline, inference_lock = cls._get_entry(task, model)
+        with inference_lock:
+            return fn(local_pipeline)
+
+    @classmethod
+    def unload(cls, task: str, model: str):
+        with cls._lock:
+            cls._pipelines.pop((task, model), None)
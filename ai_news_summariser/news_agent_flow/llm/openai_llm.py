@@ -1,6 +1,7 @@
 from crewai import LLM
 from langchain_openai import ChatOpenAI 
 from news_agent_flow.configs import AppConfigModel
+from news_agent_flow.configs.agent_config import LLMConfigModel
 
 import os
 from dotenv import load_dotenv
@@ -15,10 +16,11 @@ class OpenAICrewLLM:
     """
     llm: LLM
 
-    def __init__(self):
+    def __init__(self, llm_config: LLMConfigModel = None):
+        llm_config = llm_config or _openai_llm
         self.llm = LLM(
-            model=f"{_openai_llm.model.crew_ai}",
-            temperature=_openai_llm.temprature,
+            model=f"{llm_config.model.crew_ai}",
+            temperature=llm_config.temprature,
             api_key=os.getenv("OPENAI_API_KEY")  # or correct param name
         )
 
@@ -36,9 +38,11 @@ class OpenAILangchainLLM:
     """
 
     llm: ChatOpenAI
-    def __init__(self):
+    def __init__(self, llm_config: LLMConfigModel = None):
+        llm_config = llm_config or _openai_llm
         self.llm = ChatOpenAI(
-            model=f"{_openai_llm.model.langchain}",
+            model=f"{llm_config.model.langchain}",
+            temperature=llm_config.temprature,
             api_key=os.getenv("OPENAI_API_KEY"))
     
     def get_llm(self):
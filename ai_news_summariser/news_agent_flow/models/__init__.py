@@ -1,11 +1,11 @@
 from .tavily_search_result import TavilyResponse, TavilyResultItem, OutputGenreSummarisedResponseModel, OutputGenreSummaryModel
 from .tavily_crawl_results import TavilyCrawlListModel, TavilyCrawlItemModel
-from .news_summary import SummarisedNewsArticle
-from .genre_summary import GenreSumarisedModel, FinalGenreSummaryModel
-from .graph_state import NewsAgentState
+from .news_summary import SummarisedNewsArticle, ArticleResultModel
+from .genre_summary import GenreSumarisedModel, FinalGenreSummaryModel, GenreAssignmentModel, GenreAssignmentListModel
+from .graph_state import NewsAgentState, ArticleTaskState
 
 __all__ = ["TavilyResponse", "TavilyResultItem", "OutputGenreSummarisedResponseModel", "OutputGenreSummaryModel",
            "TavilyCrawlListModel", "TavilyCrawlItemModel",
-           "SummarisedNewsArticle",
-           "GenreSumarisedModel", "FinalGenreSummaryModel",
-           "NewsAgentState"]
\ No newline at end of file
+           "SummarisedNewsArticle", "ArticleResultModel",
+           "GenreSumarisedModel", "FinalGenreSummaryModel", "GenreAssignmentModel", "GenreAssignmentListModel",
+           "NewsAgentState", "ArticleTaskState"]
\ No newline at end of file
@@ -20,6 +20,16 @@ class GenreSumarisedModel(BaseModel):
 
         return GenreSumarisedModel(categories=raw_data["categories"])
 
+class GenreAssignmentModel(BaseModel):
+    url: str
+    genre: str
+
+class GenreAssignmentListModel(BaseModel):
+    assignments: List[GenreAssignmentModel]
+
+    def to_url_genre_map(self) -> Dict[str, str]:
+        return {item.url.strip(): item.genre for item in self.assignments}
+
 class FinalGenreSummaryModel(BaseModel):
     genre: str
     summary: str
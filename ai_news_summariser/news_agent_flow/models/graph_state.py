@@ -1,6 +1,7 @@
-from typing import TypedDict
-from news_agent_flow.models import TavilyResponse, OutputGenreSummarisedResponseModel
-from news_agent_flow.models import TavilyCrawlListModel, GenreSumarisedModel, SummarisedNewsArticle
+from typing import Annotated, TypedDict
+import operator
+from news_agent_flow.models import TavilyResponse, TavilyResultItem, OutputGenreSummarisedResponseModel
+from news_agent_flow.models import TavilyCrawlListModel, GenreSumarisedModel, SummarisedNewsArticle, ArticleResultModel
 
 # Define the state schema
 class NewsAgentState(TypedDict):
@@ -10,5 +11,16 @@ class NewsAgentState(TypedDict):
     news_summary: list[SummarisedNewsArticle] | None
     genre_summary: GenreSumarisedModel | None
     final_summary: OutputGenreSummarisedResponseModel | None
+    # Searched urls whose content could not be fetched within the deadlines
+    dropped_urls: list[str] | None
+    # Representative url of each near duplicate cluster mapped to all the urls of the cluster
+    source_urls: dict[str, list[str]] | None
+    # Per article pipeline results, every fanned out article appends its own
+    article_results: Annotated[list[ArticleResultModel], operator.add]
     has_error: bool
-    error_message: str
\ No newline at end of file
+    error_message: str
+
+# State sent to each fanned out article
+class ArticleTaskState(TypedDict):
+    query: str
+    article: TavilyResultItem
\ No newline at end of file
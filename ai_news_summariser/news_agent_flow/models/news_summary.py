@@ -1,11 +1,15 @@
-from typing import List
+from typing import List, Optional
 from pydantic import BaseModel, HttpUrl
 import json
 
+from .tavily_crawl_results import TavilyCrawlListModel
+
 class SummarisedNewsArticle(BaseModel):
     url: str
     title: str | None = None
     summary: str
+    # Every searched url of the story when near duplicates were collapsed into this article
+    source_urls: list[str] = []
 
     @staticmethod
     def from_file(file_path: str) -> List['SummarisedNewsArticle']:
@@ -14,4 +18,13 @@ class SummarisedNewsArticle(BaseModel):
         """
         with open(file_path, 'r', encoding='utf-8') as f:
             data = json.load(f)
-        return [SummarisedNewsArticle(**item) for item in data]
\ No newline at end of file
+        return [SummarisedNewsArticle(**item) for item in data]
+
+class ArticleResultModel(BaseModel):
+    """
+    Outcome of one search result in the per article pipeline, fields stay None past the step that failed
+    """
+    url: str
+    crawl: Optional[TavilyCrawlListModel] = None
+    summary: Optional[SummarisedNewsArticle] = None
+    genre: Optional[str] = None
@@ -2,8 +2,12 @@ from .assign_genre_node import assign_genre
 from .final_summary_node import final_genre_summary
 from .search_web_node import search_web_for_news, crawl_news_content
 from .summariser_node import summarise_news
+from .dedupe_node import dedupe_news_content, dedupe_search_results
+from .article_pipeline_node import process_article, join_article_summaries, join_article_genres
 
 __all__ = ["assign_genre",
            "final_genre_summary",
            "search_web_for_news", "crawl_news_content",
-           "summarise_news"]
\ No newline at end of file
+           "summarise_news",
+           "dedupe_news_content", "dedupe_search_results",
+           "process_article", "join_article_summaries", "join_article_genres"]
\ No newline at end of file
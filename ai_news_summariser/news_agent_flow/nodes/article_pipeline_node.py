@@ -0,0 +1,153 @@
+from news_agent_flow.models import TavilyCrawlListModel, GenreSumarisedModel, SummarisedNewsArticle, NewsAgentState
+from news_agent_flow.models import TavilyResultItem, ArticleResultModel, ArticleTaskState
+from news_agent_flow.tools import GenreManager
+from news_agent_flow.configs import AppConfigModel
+from news_agent_flow.utils import log_node, MicroBatcher
+from langgraph.config import get_stream_writer
+from .search_web_node import fetch_news_content
+from .summariser_node import fetch_article_summaries
+from .assign_genre_node import classify_articles
+from .dedupe_node import collapse_near_duplicates, merge_source_urls, with_source_urls
+
+import asyncio
+import json
+from datetime import datetime
+
+app_config = AppConfigModel.from_json_file("news_agent_flow/configs/agent_config.json")
+
+# The fanned out articles of every running query share these, so the summariser and the genre classifier
+# still get the multi article batches of the staged flow instead of one call per article
+_summary_batcher = MicroBatcher(fetch_article_summaries, batch_size=app_config.pipeline_batch_size,
+                                batch_window_seconds=app_config.pipeline_batch_window_seconds)
+_genre_batcher = MicroBatcher(classify_articles, batch_size=app_config.pipeline_batch_size,
+                              batch_window_seconds=app_config.pipeline_batch_window_seconds)
+
+def _mock_article_result(article: TavilyResultItem) -> ArticleResultModel:
+    """
+    Builds the article result from the per stage mock fixtures
+    """
+    crawl_by_url = {crawl.base_url: crawl for crawl in TavilyCrawlListModel.from_json_file("mock_run/json_files/tavily_AI_crawl.json")}
+    summary_by_url = {summary.url: summary for summary in SummarisedNewsArticle.from_file("mock_run/json_files/tavily_AI_Summary.json")}
+    genre_summary = GenreSumarisedModel.from_json_file("mock_run/json_files/tavily_AI_Genre_Summary.json")
+    genre_by_url = {news_summary.url: genre for genre, news_summaries in genre_summary.categories.items() for news_summary in news_summaries}
+
+    return ArticleResultModel(url=article.url,
+                              crawl=crawl_by_url.get(article.url),
+                              summary=summary_by_url.get(article.url),
+                              genre=genre_by_url.get(article.url))
+
+@log_node("process_article")
+async def process_article(state: ArticleTaskState) -> NewsAgentState:
+    """
+    Runs one search result through extract, clean, summarise and classify independently of the other results
+    """
+    started_at = datetime.now()
+    article: TavilyResultItem = state["article"]
+    result = ArticleResultModel(url=article.url)
+    try:
+        if app_config.is_mock:
+            result = _mock_article_result(article)
+            await asyncio.sleep(app_config.mock_delay_seconds)
+        else:
+            writer = get_stream_writer()
+            result.crawl = (await fetch_news_content([article])).get(article.url)
+            if result.crawl and result.crawl.results:
+                result.summary = await _summary_batcher.submit(article.url, {
+                    "url": article.url,
+                    "title": article.title,
+                    "content": result.crawl.results[0].raw_content
+                })
+            if result.summary:
+                # Batches serve several articles, each article emits its own events
+                writer({"article_summarised": result.summary.model_dump()})
+                result.genre = await _genre_batcher.submit(article.url, result.summary)
+            if result.genre:
+                writer({"article_genre_assigned": {**result.summary.model_dump(), "genre": result.genre}})
+    except Exception as e:
+        # A failed article is dropped at the join, it never fails the other articles
+        print(f"Exception in process_article {article.url} {str(e)}")
+
+    duration_seconds = (datetime.now() - started_at).total_seconds()
+    print(f"process_article {article.url} Time taken: {duration_seconds} seconds")
+
+    return {"article_results": [result]}
+
+def _ordered_article_results(state: NewsAgentState) -> list[ArticleResultModel]:
+    """
+    Returns the article results in the order of the search results, whatever order they completed in
+    """
+    results_by_url = {article_result.url: article_result for article_result in state.get("article_results") or []}
+    return [results_by_url[item.url] for item in state["results_search"].results if item.url in results_by_url]
+
+async def _collapse_article_duplicates(article_results: list[ArticleResultModel]) -> dict[str, list[str]] | None:
+    """
+    Clusters the summarised articles on their extracted content. Search results were already collapsed on their
+    snippets before fanning out, this catches the copies whose snippets differed and keeps them out of the genre summaries
+    """
+    if not app_config.near_duplicate.is_active:
+        return None
+    summarised = [article_result for article_result in article_results if article_result.summary]
+    # An article without extracted content stays its own cluster
+    return await asyncio.to_thread(collapse_near_duplicates, [article_result.url for article_result in summarised],
+                                   [article_result.crawl.results[0].raw_content or ""
+                                    if article_result.crawl and article_result.crawl.results else ""
+                                    for article_result in summarised])
+
+@log_node("join_article_summaries")
+async def join_article_summaries(state: NewsAgentState) -> NewsAgentState:
+    try:
+        article_results = _ordered_article_results(state)
+        result_crawl = [article_result.crawl for article_result in article_results if article_result.crawl]
+        source_urls = merge_source_urls(state.get("source_urls"), await _collapse_article_duplicates(article_results))
+        news_summary = with_source_urls([article_result.summary for article_result in article_results if article_result.summary
+                                         and (source_urls is None or article_result.url in source_urls)], source_urls)
+        fetched_urls = {article_result.url for article_result in article_results if article_result.crawl}
+        # Search results collapsed before fanning out were never fetched, they are not dropped
+        routed_urls = state.get("source_urls")
+        dropped_urls = [item.url for item in state["results_search"].results
+                        if item.url not in fetched_urls and (routed_urls is None or item.url in routed_urls)]
+        if dropped_urls:
+            print(f"join_article_summaries dropped {len(dropped_urls)} urls {dropped_urls}")
+
+        with open("mock_run/json_files/tavily_AI_crawl.json", "w", encoding="utf-8") as f:
+            json.dump([item.model_dump() for item in result_crawl], f, indent=4)
+        with open("mock_run/json_files/tavily_AI_Summary.json", "w", encoding="utf-8") as f:
+            json.dump([item.model_dump() for item in news_summary], f, indent=4)
+
+        print("Returning from join_article_summaries")
+        return {
+            "result_crawl": result_crawl,
+            "news_summary": news_summary,
+            "dropped_urls": dropped_urls,
+            "source_urls": source_urls
+        }
+    except Exception as e:
+        print(f"Exception in join_article_summaries {str(e)}")
+        return {
+            "has_error": True,
+            "error_message": str(e)
+        }
+
+@log_node("join_article_genres")
+async def join_article_genres(state: NewsAgentState) -> NewsAgentState:
+    try:
+        source_urls = state.get("source_urls")
+        article_results = [article_result for article_result in _ordered_article_results(state)
+                           if article_result.summary and article_result.genre
+                           and (source_urls is None or article_result.url in source_urls)]
+        result = GenreManager.group_by_genre(with_source_urls([article_result.summary for article_result in article_results], source_urls),
+                                             [article_result.genre for article_result in article_results])
+
+        with open("mock_run/json_files/tavily_AI_Genre_Summary.json", "w", encoding="utf-8") as f:
+            json.dump(result.model_dump(), f, indent=4)
+
+        print("Returning from join_article_genres")
+        return {
+            "genre_summary": result
+        }
+    except Exception as e:
+        print(f"Exception in join_article_genres {str(e)}")
+        return {
+            "has_error": True,
+            "error_message": str(e)
+        }
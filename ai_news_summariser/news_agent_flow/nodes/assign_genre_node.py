@@ -1,23 +1,39 @@
-from news_agent_flow.models import GenreSumarisedModel, NewsAgentState
+from news_agent_flow.models import GenreSumarisedModel, SummarisedNewsArticle, NewsAgentState
 from news_agent_flow.tools import GenreManager
 from news_agent_flow.configs import AppConfigModel
 from news_agent_flow.utils import log_node
+from langgraph.config import get_stream_writer
 
-import time
+import asyncio
 import json
 from datetime import datetime
 
 app_config = AppConfigModel.from_json_file("news_agent_flow/configs/agent_config.json")
 
+def _genre_assigned_writer():
+    """
+    Emits article_genre_assigned on the custom stream as soon as the genre of an article is known
+    """
+    writer = get_stream_writer()
+    return lambda news_summary, genre: writer({"article_genre_assigned": {**news_summary.model_dump(), "genre": genre}})
+
+async def classify_articles(news_summaries: dict[str, SummarisedNewsArticle]) -> dict[str, str]:
+    """
+    Returns the url to genre mapping of the url keyed summaries in one classify_summaries call, without emitting any event
+    """
+    genre_manager = GenreManager()
+    genre_str = genre_manager.parse_genre(app_config.genre_list)
+    return dict(zip(news_summaries, await genre_manager.classify_summaries(genre_str, list(news_summaries.values()))))
+
 @log_node("assign_genre")
-def assign_genre(state: NewsAgentState) -> NewsAgentState:
+async def assign_genre(state: NewsAgentState) -> NewsAgentState:
     started_at = datetime.now()
     try:
         if app_config.is_mock:
             result = GenreSumarisedModel.from_json_file("mock_run/json_files/tavily_AI_Genre_Summary.json")
-            time.sleep(5)
+            await asyncio.sleep(app_config.mock_delay_seconds)
         else:
-            result = GenreManager().assign_genre_to_summaries(state["news_summary"])
+            result = await GenreManager().assign_genre_to_summaries(state["news_summary"], on_genre=_genre_assigned_writer())
         
         ended_at = datetime.now()
         
@@ -0,0 +1,100 @@
+from news_agent_flow.models import TavilyCrawlListModel, SummarisedNewsArticle, NewsAgentState
+from news_agent_flow.tools import cluster_near_duplicates
+from news_agent_flow.configs import AppConfigModel
+from news_agent_flow.utils import log_node
+
+import asyncio
+from datetime import datetime
+
+app_config = AppConfigModel.from_json_file("news_agent_flow/configs/agent_config.json")
+
+def collapse_near_duplicates(urls: list[str], contents: list[str]) -> dict[str, list[str]]:
+    """
+    Maps the representative url of each near duplicate cluster to all the urls of the cluster, in the input order.
+    CPU bound, callers run it in a worker thread
+    """
+    near_duplicate = app_config.near_duplicate
+    clusters = cluster_near_duplicates(contents, threshold=near_duplicate.threshold,
+                                       num_perm=near_duplicate.num_perm, shingle_size=near_duplicate.shingle_size)
+    source_urls = {urls[cluster[0]]: [urls[index] for index in cluster] for cluster in clusters}
+    collapsed = {url: cluster_urls for url, cluster_urls in source_urls.items() if len(cluster_urls) > 1}
+    if collapsed:
+        print(f"Collapsed {len(urls) - len(source_urls)} near duplicate articles {collapsed}")
+    return source_urls
+
+def merge_source_urls(source_urls: dict[str, list[str]] | None, collapsed: dict[str, list[str]] | None) -> dict[str, list[str]] | None:
+    """
+    Combines a second clustering over the representatives of source_urls, each new cluster gets every url of its members
+    """
+    if collapsed is None:
+        return source_urls
+    if source_urls is None:
+        return collapsed
+    return {url: [source_url for member in members for source_url in source_urls.get(member, [member])]
+            for url, members in collapsed.items()}
+
+def with_source_urls(news_summaries: list[SummarisedNewsArticle], source_urls: dict[str, list[str]] | None) -> list[SummarisedNewsArticle]:
+    """
+    Copies the cluster urls onto the summary of each representative article
+    """
+    if not source_urls:
+        return news_summaries
+    return [news_summary.model_copy(update={"source_urls": source_urls.get(news_summary.url, [news_summary.url])})
+            for news_summary in news_summaries]
+
+@log_node("dedupe_news_content")
+async def dedupe_news_content(state: NewsAgentState) -> NewsAgentState:
+    """
+    Keeps one representative per near duplicate story so each story is summarised, classified and final summarised once
+    """
+    started_at = datetime.now()
+    try:
+        crawl_models = [wcl if isinstance(wcl, TavilyCrawlListModel) else TavilyCrawlListModel(**wcl) for wcl in state["result_crawl"]]
+        crawl_by_url = {wcl.base_url: wcl for wcl in crawl_models if wcl.results}
+        urls = [item.url for item in state["results_search"].results if item.url in crawl_by_url]
+
+        source_urls = await asyncio.to_thread(collapse_near_duplicates, urls,
+                                              [crawl_by_url[url].results[0].raw_content or "" for url in urls])
+        result = [crawl_by_url[url] for url in source_urls]
+
+        duration_seconds = (datetime.now() - started_at).total_seconds()
+        print(f"dedupe_news_content Time taken: {duration_seconds} seconds")
+
+        print("Returning from dedupe_news_content")
+        return {
+            "result_crawl": result,
+            "source_urls": source_urls
+        }
+    except Exception as e:
+        # Deduplication only saves work, the articles go on undeduplicated when it fails
+        print(f"Exception in dedupe_news_content {str(e)}")
+        return {
+            "source_urls": None
+        }
+
+
+@log_node("dedupe_search_results")
+async def dedupe_search_results(state: NewsAgentState) -> NewsAgentState:
+    """
+    Keeps one representative per near duplicate story among the search results, clustered on the search snippets,
+    so the fanned out flow extracts, summarises and classifies each story once
+    """
+    started_at = datetime.now()
+    try:
+        results = state["results_search"].results
+        source_urls = await asyncio.to_thread(collapse_near_duplicates, [item.url for item in results],
+                                              [item.content or "" for item in results])
+
+        duration_seconds = (datetime.now() - started_at).total_seconds()
+        print(f"dedupe_search_results Time taken: {duration_seconds} seconds")
+
+        print("Returning from dedupe_search_results")
+        return {
+            "source_urls": source_urls
+        }
+    except Exception as e:
+        # Deduplication only saves work, every search result fans out when it fails
+        print(f"Exception in dedupe_search_results {str(e)}")
+        return {
+            "source_urls": None
+        }
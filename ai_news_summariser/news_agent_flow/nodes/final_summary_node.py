@@ -2,28 +2,36 @@ from news_agent_flow.models import NewsAgentState
 from news_agent_flow.models import OutputGenreSummarisedResponseModel
 from news_agent_flow.agents import NewsSummariser
 from news_agent_flow.configs import AppConfigModel
+from news_agent_flow.cache import LLMCache
 from news_agent_flow.utils import log_node
+from langgraph.config import get_stream_writer
 
-import time
+import asyncio
 import json
 from datetime import datetime
 
 app_config = AppConfigModel.from_json_file("news_agent_flow/configs/agent_config.json")
 
 @log_node("final_genre_summary")
-def final_genre_summary(state: NewsAgentState) -> NewsAgentState:
+async def final_genre_summary(state: NewsAgentState) -> NewsAgentState:
     started_at = datetime.now()
     try:
         if app_config.is_mock:
             out_obj: OutputGenreSummarisedResponseModel = OutputGenreSummarisedResponseModel.from_file("mock_run/json_files/tavily_AI_Final_Summarised_Genre.json")
-            time.sleep(5)
+            await asyncio.sleep(app_config.mock_delay_seconds)
         else:
-            out_obj: OutputGenreSummarisedResponseModel = NewsSummariser().summarise_genre_news(state["genre_summary"])
+            # Each genre is emitted on the custom stream as soon as its summary is ready
+            writer = get_stream_writer()
+            out_obj: OutputGenreSummarisedResponseModel = await NewsSummariser().summarise_genre_news(
+                state["genre_summary"],
+                on_genre_summary=lambda genre, summary: writer({"final_genre_summary_item": {genre: summary}})
+            )
 
         ended_at = datetime.now()
 
         duration_seconds = (ended_at - started_at).total_seconds()
         print(f"final_genre_summary Time taken: {duration_seconds} seconds")
+        print(f"LLM cache stats: {LLMCache.get_instance().stats()}")
 
         with open("mock_run/json_files/tavily_AI_Final_Summarised_Genre.json", "w", encoding="utf-8") as f:
             json.dump(out_obj.model_dump(), f, indent=4)
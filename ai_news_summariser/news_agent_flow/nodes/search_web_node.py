@@ -1,24 +1,27 @@
 from news_agent_flow.models import TavilyCrawlListModel, GenreSumarisedModel, SummarisedNewsArticle, NewsAgentState
-from news_agent_flow.models import TavilyResponse, OutputGenreSummarisedResponseModel
-from news_agent_flow.tools import GenreManager, search_news_on_web, summarise_news_list, get_news_content
+from news_agent_flow.models import TavilyResponse, TavilyResultItem, OutputGenreSummarisedResponseModel
+from news_agent_flow.tools import GenreManager, asearch_news_on_web, aget_news_content
 from news_agent_flow.configs import AppConfigModel
 from news_agent_flow.utils import log_node
+from news_agent_flow.cache import ArticleStore
+from langgraph.config import get_stream_writer
+from typing import Callable, Optional
 
-import time
+import asyncio
 import json
 from datetime import datetime
 
 app_config = AppConfigModel.from_json_file("news_agent_flow/configs/agent_config.json")
 
 @log_node("search_web_for_news")
-def search_web_for_news(state: NewsAgentState) -> NewsAgentState: 
+async def search_web_for_news(state: NewsAgentState) -> NewsAgentState: 
     started_at = datetime.now()
     try:
         if app_config.is_mock:
             result = TavilyResponse.from_json_file("mock_run/json_files/tavily_AI_response.json")
-            time.sleep(5)
+            await asyncio.sleep(app_config.mock_delay_seconds)
         else:
-            result = search_news_on_web.run(state["query"])
+            result = await asearch_news_on_web(state["query"])
         
         with open("mock_run/json_files/tavily_AI_response.json", "w", encoding="utf-8") as f:
             json.dump(result.model_dump(), f, indent=4)
@@ -42,8 +45,62 @@ def search_web_for_news(state: NewsAgentState) -> NewsAgentState:
     
     return
     
+def _match_requested_url(crawl_item, requested_urls: set[str]) -> tuple[Optional[str], TavilyCrawlListModel]:
+    """
+    Returns the searched url a crawl result belongs to (None when it matches none) with the crawl model
+    """
+    crawl_model = crawl_item if isinstance(crawl_item, TavilyCrawlListModel) else TavilyCrawlListModel(**crawl_item)
+    crawled_url = crawl_model.base_url
+    if crawled_url not in requested_urls and crawl_model.results:
+        crawled_url = crawl_model.results[0].url
+    return (crawled_url if crawled_url in requested_urls else None), crawl_model
+
+async def _get_news_content_by_url(search_results: list[TavilyResultItem], urls: list[str],
+                                   on_extracted: Optional[Callable[[str], None]] = None) -> dict[str, TavilyCrawlListModel]:
+    """
+    Crawls the given urls of the search results, the crawl results are keyed by the searched url.
+    on_extracted is called with each searched url as soon as its content is fetched
+    """
+    requested_urls = set(urls)
+    crawl_items = [item for item in search_results if item.url in requested_urls]
+
+    def _on_article(crawl_item):
+        crawled_url, _ = _match_requested_url(crawl_item, requested_urls)
+        if crawled_url and on_extracted:
+            on_extracted(crawled_url)
+
+    crawl_by_url = {}
+    for crawl_item in await aget_news_content(crawl_items, on_article=_on_article):
+        crawled_url, crawl_model = _match_requested_url(crawl_item, requested_urls)
+        if crawled_url:
+            crawl_by_url[crawled_url] = crawl_model.model_copy(update={"base_url": crawled_url})
+    return crawl_by_url
+
+async def fetch_news_content(search_results: list[TavilyResultItem]) -> dict[str, TavilyCrawlListModel]:
+    """
+    Fetches the content of the search results keyed by the searched url, emitting article_extracted for each article.
+    Content already fetched by any query within the freshness window is reused, only the rest is crawled
+    """
+    titles = {item.url: item.title for item in search_results}
+    writer = get_stream_writer()
+    extracted_urls = set()
+
+    def _on_extracted(url):
+        # Each article is emitted on the custom stream as soon as its content is fetched
+        if url not in extracted_urls:
+            extracted_urls.add(url)
+            writer({"article_extracted": {"url": url, "title": titles.get(url)}})
+
+    crawl_by_url = await ArticleStore.get_instance().fetch_many(f"content:{app_config.active_web_crawl.name}", titles,
+                                                               lambda missing_urls: _get_news_content_by_url(search_results, missing_urls, _on_extracted))
+    # Articles served from the store or by another request's fetch are emitted once it returns
+    for url in titles:
+        if url in crawl_by_url:
+            _on_extracted(url)
+    return crawl_by_url
+
 @log_node("crawl_news_content")
-def crawl_news_content(state: NewsAgentState) -> TavilyCrawlListModel:
+async def crawl_news_content(state: NewsAgentState) -> TavilyCrawlListModel:
 
     def is_list_of_Crawl(obj):
         return isinstance(obj, list) and all(isinstance(item, TavilyCrawlListModel) for item in obj)
@@ -51,13 +108,17 @@ def crawl_news_content(state: NewsAgentState) -> TavilyCrawlListModel:
     started_at = datetime.now()
     try:
         response: TavilyResponse = state["results_search"]
+        dropped_urls = []
         if app_config.is_mock:
             result = TavilyCrawlListModel.from_json_file("mock_run/json_files/tavily_AI_crawl.json")
-            time.sleep(5)
+            await asyncio.sleep(app_config.mock_delay_seconds)
         else:
             # crawl_results = crawl_url_list.run(response.results)
-            crawl_results = [TavilyCrawlListModel(**item) for item in get_news_content.run(response.results)]
+            urls = [item.url for item in response.results]
+            crawl_by_url = await fetch_news_content(response.results)
+            crawl_results = [crawl_by_url[url] for url in urls if url in crawl_by_url]
             result = crawl_results
+            dropped_urls = [url for url in urls if url not in crawl_by_url]
         ended_at = datetime.now()
         
         duration_seconds = (ended_at - started_at).total_seconds()
@@ -66,11 +127,15 @@ def crawl_news_content(state: NewsAgentState) -> TavilyCrawlListModel:
         with open("mock_run/json_files/tavily_AI_crawl.json", "w", encoding="utf-8") as f:
             json.dump([item.model_dump() for item in result] if is_list_of_Crawl(result) else result, f, indent=4)
 
+        if dropped_urls:
+            print(f"crawl_news_content dropped {len(dropped_urls)} urls {dropped_urls}")
+
         print("Returning from crawl_news_content")
         return {
             "query": state["query"],
             "results_search": state["results_search"],
-            "result_crawl": result
+            "result_crawl": result,
+            "dropped_urls": dropped_urls
         }
     except Exception as e:
         print(f"Exception in crawl_news_content {str(e)}")
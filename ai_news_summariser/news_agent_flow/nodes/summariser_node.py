@@ -1,35 +1,80 @@
 from news_agent_flow.models import TavilyCrawlListModel, GenreSumarisedModel, SummarisedNewsArticle, NewsAgentState
 from news_agent_flow.models import TavilyResponse, OutputGenreSummarisedResponseModel
-from news_agent_flow.tools import GenreManager, search_news_on_web, summarise_news_list, get_news_content
+from news_agent_flow.tools import GenreManager, asummarise_news_list
 from news_agent_flow.configs import AppConfigModel
 from news_agent_flow.utils import log_node
+from news_agent_flow.cache import ArticleStore
+from langgraph.config import get_stream_writer
+from .dedupe_node import with_source_urls
 
-import time
+from typing import Callable, Optional
+import asyncio
 import json
 from datetime import datetime
 
 
 app_config = AppConfigModel.from_json_file("news_agent_flow/configs/agent_config.json")
 
+async def fetch_article_summaries(news_articles: dict[str, dict],
+                                  on_summarised: Optional[Callable[[dict], None]] = None) -> dict[str, SummarisedNewsArticle]:
+    """
+    Summarises the url keyed articles without emitting any event, on_summarised is called with each new summary.
+    Summaries made for any query within the freshness window are reused, only the rest is summarised
+    """
+    async def _summarise_missing(urls):
+        return {summary.url: summary for summary in await asummarise_news_list([news_articles[url] for url in urls],
+                                                                               on_article=on_summarised)}
+
+    return await ArticleStore.get_instance().fetch_many(f"summary:{app_config.active_summarizer.name}",
+                                                        list(news_articles), _summarise_missing)
+
+async def summarise_articles(news_articles: dict[str, dict]) -> dict[str, SummarisedNewsArticle]:
+    """
+    Summarises the url keyed articles, emitting article_summarised for each article
+    """
+    writer = get_stream_writer()
+    summarised_urls = set()
+
+    def _on_summarised(summary: dict):
+        # Each summary is emitted on the custom stream as soon as it is ready
+        if summary["url"] not in summarised_urls:
+            summarised_urls.add(summary["url"])
+            writer({"article_summarised": summary})
+
+    summary_by_url = await fetch_article_summaries(news_articles, _on_summarised)
+    for url in news_articles:
+        if url in summary_by_url:
+            _on_summarised(summary_by_url[url].model_dump())
+    return summary_by_url
+
 @log_node("summarise_news")
-def summarise_news(state: NewsAgentState) -> NewsAgentState:
+async def summarise_news(state: NewsAgentState) -> NewsAgentState:
     started_at = datetime.now()
     try:
         if app_config.is_mock:
-            result = SummarisedNewsArticle.from_file("mock_run/json_files/tavily_AI_Summary.json")
-            time.sleep(5)
+            source_urls = state.get("source_urls")
+            result = with_source_urls([summary for summary in SummarisedNewsArticle.from_file("mock_run/json_files/tavily_AI_Summary.json")
+                                       if not source_urls or summary.url in source_urls], source_urls)
+            await asyncio.sleep(app_config.mock_delay_seconds)
         else:
-            news_articles = []
+            news_articles = {}
+
+            crawl_models = [wcl if isinstance(wcl, TavilyCrawlListModel) else TavilyCrawlListModel(**wcl) for wcl in state["result_crawl"]]
+            crawl_by_url = {wcl.base_url: wcl for wcl in crawl_models if wcl.results}
 
-            for wbs, wcl in zip(state["results_search"].results, state["result_crawl"]):
-                combined = {
+            for wbs in state["results_search"].results:
+                wcl = crawl_by_url.get(wbs.url)
+                if wcl is None:
+                    continue
+                news_articles[wbs.url] = {
                     "url": wbs.url, 
                     "title": wbs.title,
-                    "content": wcl.results[0].raw_content if isinstance(wcl, TavilyCrawlListModel) else wcl["results"][0]["raw_content"]
+                    "content": wcl.results[0].raw_content
                 }
-                news_articles.append(combined)
 
-            result = summarise_news_list.run(news_articles)
+            summary_by_url = await summarise_articles(news_articles)
+            result = with_source_urls([summary_by_url[url] for url in news_articles if url in summary_by_url],
+                                      state.get("source_urls"))
         ended_at = datetime.now()
 
         duration_seconds = (ended_at - started_at).total_seconds()
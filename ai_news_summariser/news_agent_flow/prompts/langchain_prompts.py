@@ -22,6 +22,28 @@ class LangChainPrompts:
 
         return chat_prompt
     
+    @staticmethod
+    def get_batch_genre_prompt():
+        system_temp = SystemMessagePromptTemplate.from_template(
+            """You are an experienced news editor.
+            Your task is to classify each news summary into the most appropriate genre from the list below:
+            Genres: {genres}
+            
+            Instructions:
+            - Every news summary is preceded by its URL.
+            - Choose **only one** genre label from the list for each summary.
+            - Return one assignment per summary, copying the URL exactly as given.
+            - Do **not** include any explanation or additional text.
+            """, input_variables=['genres'])
+
+        human_temp = HumanMessagePromptTemplate.from_template(
+            """News Summaries:
+            {content}""", input_variables=['content'])
+
+        chat_prompt = ChatPromptTemplate.from_messages([system_temp, human_temp])
+
+        return chat_prompt
+
     @staticmethod
     def get_individual_news_summariser_prompt():
         system_temp = SystemMessagePromptTemplate.from_template(
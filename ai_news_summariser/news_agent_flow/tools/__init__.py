@@ -1,9 +1,12 @@
-from .tavily_web_search import search_news_on_web, get_news_content
-from .news_summariser import summarise_news_list
+from .tavily_web_search import search_news_on_web, get_news_content, asearch_news_on_web, aget_news_content
+from .news_summariser import summarise_news_list, asummarise_news_list
 from .assign_genre import GenreManager
-from .clean_html_links import clean_web_content, clean_html_and_entities
+from .local_genre_classifier import LocalGenreClassifier
+from .clean_html_links import clean_web_content, clean_html_and_entities, clean_page
+from .near_duplicates import cluster_near_duplicates
 
-__all__ = ["search_news_on_web", "get_news_content",
-           "summarise_news_list",
-           "GenreManager",
-           "clean_web_content", "clean_html_and_entities"]
\ No newline at end of file
+__all__ = ["search_news_on_web", "get_news_content", "asearch_news_on_web", "aget_news_content",
+           "summarise_news_list", "asummarise_news_list",
+           "GenreManager", "LocalGenreClassifier",
+           "clean_web_content", "clean_html_and_entities", "clean_page",
+           "cluster_near_duplicates"]
\ No newline at end of file
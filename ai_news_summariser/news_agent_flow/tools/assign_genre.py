@@ -1,10 +1,18 @@
 from news_agent_flow.prompts import LangChainPrompts
-from news_agent_flow.llm import LLMFactory
-from news_agent_flow.models import SummarisedNewsArticle, GenreSumarisedModel
+from news_agent_flow.llm import LLMFactory, LLMRegistry
+from news_agent_flow.models import SummarisedNewsArticle, GenreSumarisedModel, GenreAssignmentListModel
 from news_agent_flow.configs import AppConfigModel
+from news_agent_flow.cache import CachedChain
+from .local_genre_classifier import LocalGenreClassifier
+from .genre_index import GenreIndex
+
+from typing import Callable, Optional
+import asyncio
 
 app_config = AppConfigModel.from_json_file("news_agent_flow/configs/agent_config.json")
 
+GenreCallback = Callable[[SummarisedNewsArticle, str], None]
+
 class GenreManager:
     def parse_genre(self, genres):
         if isinstance(genres, list):
@@ -14,6 +22,12 @@ class GenreManager:
         else:
             return ", ".join(app_config.genre_list)
     def assign_genre(self):
+        return LLMRegistry.get_chain("assign_genre", self._build_assign_genre_chain)
+
+    def assign_genre_batch(self):
+        return LLMRegistry.get_chain("assign_genre_batch", self._build_assign_genre_batch_chain)
+
+    def _build_assign_genre_chain(self):
         prompt = LangChainPrompts.get_genre_prompt()
         
         llm = LLMFactory.build_langchain_llm()
@@ -28,41 +42,190 @@ class GenreManager:
                         | {"genre": lambda x: x.content}  # Extract content from AI response
                         )
 
-        return chain_exec
+        return CachedChain(chain_exec, model=LLMRegistry.client_key("langchain"), template=prompt.pretty_repr())
     
-    def get_genre(self, genre: list[str], content):
+    def _build_assign_genre_batch_chain(self):
+        prompt = LangChainPrompts.get_batch_genre_prompt()
+
+        llm = LLMFactory.build_langchain_llm().with_structured_output(GenreAssignmentListModel)
+
+        chain_exec = (
+                        {
+                            "genres": lambda x: x["genres"].upper(),
+                            "content": lambda x: x["content"]
+                        }
+                        | prompt
+                        | llm
+                        )
+
+        return CachedChain(chain_exec, model=LLMRegistry.client_key("langchain"), template=prompt.pretty_repr(),
+                           output_model=GenreAssignmentListModel)
+
+    async def get_genre(self, genre: list[str], content):
         genre_str = self.parse_genre(genres=genre)
         chain = self.assign_genre()
 
-        result = chain.invoke({
+        result = await chain.ainvoke({
             "genres" : genre_str,
             "content" : content
         })
 
         return result
 
-    def assign_genre_to_summaries(self, news_summaries: list[SummarisedNewsArticle]) -> GenreSumarisedModel:
+    async def get_genre_batch(self, genre: list[str], news_summaries: list[SummarisedNewsArticle]) -> dict[str, str]:
+        """
+        Classifies many summaries in one structured output call, returns the URL to genre mapping
+        """
+        genre_str = self.parse_genre(genres=genre)
+        chain = self.assign_genre_batch()
+
+        content = "\n\n".join(f"URL: {news_summary.url}\nSummary: {news_summary.summary}" for news_summary in news_summaries)
+
+        result: GenreAssignmentListModel = await chain.ainvoke({
+            "genres" : genre_str,
+            "content" : content
+        })
+
+        return result.to_url_genre_map()
+
+    @staticmethod
+    def _genre_index(genre_str: str) -> GenreIndex:
+        return GenreIndex.for_genres(tuple(genre.strip() for genre in genre_str.split(",") if genre.strip()))
+
+    async def _classify_one(self, genre_str: str, news_summary: SummarisedNewsArticle, on_genre: Optional[GenreCallback] = None) -> str:
+        answer = (await self.get_genre(genre=genre_str, content=news_summary.summary))["genre"]
+        # Free text answers are mapped onto the genre list so variants do not become separate genres,
+        # an empty or unmatched answer goes to unmatched_genre instead of becoming a genre of its own
+        news_genre = self._genre_index(genre_str).canonical(answer) or app_config.genre_unmatched
+        if on_genre:
+            on_genre(news_summary, news_genre)
+        return news_genre
+
+    async def _classify_batch(self, genre_str: str, news_summaries: list[SummarisedNewsArticle],
+                              semaphore: asyncio.Semaphore, on_genre: Optional[GenreCallback] = None) -> list[str]:
+        try:
+            async with semaphore:
+                url_genre_map = await self.get_genre_batch(genre_str, news_summaries)
+        except Exception as e:
+            # A failed batch call (API error or unparsable structured output) falls back to one call per summary
+            print(f"Exception in batch genre call, classifying {len(news_summaries)} summaries individually {str(e)}")
+            url_genre_map = {}
+
+        genre_index = self._genre_index(genre_str)
+        news_genres = []
+        missing = []
+        for index, news_summary in enumerate(news_summaries):
+            news_genre = url_genre_map.get(news_summary.url.strip())
+            news_genre = genre_index.canonical(news_genre) if news_genre else None
+            news_genres.append(news_genre)
+            if not news_genre:
+                missing.append(index)
+            elif on_genre:
+                on_genre(news_summary, news_genre)
+
+        async def _bounded(news_summary):
+            async with semaphore:
+                return await self._classify_one(genre_str, news_summary, on_genre)
+
+        # Summaries the model skipped, or the whole batch when its call failed, are classified one by one concurrently
+        fallback_genres = await asyncio.gather(*[_bounded(news_summaries[index]) for index in missing])
+        for index, news_genre in zip(missing, fallback_genres):
+            news_genres[index] = news_genre
+        return news_genres
+
+    async def _classify_serial(self, genre_str: str, news_summaries: list[SummarisedNewsArticle],
+                               on_genre: Optional[GenreCallback] = None) -> list[str]:
+        return [await self._classify_one(genre_str, news_summary, on_genre) for news_summary in news_summaries]
+
+    async def _classify_parallel(self, genre_str: str, news_summaries: list[SummarisedNewsArticle],
+                                 on_genre: Optional[GenreCallback] = None) -> list[str]:
+        semaphore = asyncio.Semaphore(max(1, app_config.genre_parallel))
+
+        async def _bounded(news_summary):
+            async with semaphore:
+                return await self._classify_one(genre_str, news_summary, on_genre)
+
+        return list(await asyncio.gather(*[_bounded(news_summary) for news_summary in news_summaries]))
+
+    async def _classify_batched(self, genre_str: str, news_summaries: list[SummarisedNewsArticle],
+                                on_genre: Optional[GenreCallback] = None) -> list[str]:
+        batch_size = max(1, app_config.genre_batch_size)
+        batches = [news_summaries[i:i + batch_size] for i in range(0, len(news_summaries), batch_size)]
+
+        semaphore = asyncio.Semaphore(max(1, app_config.genre_parallel))
+        batch_results = await asyncio.gather(*[self._classify_batch(genre_str, batch, semaphore, on_genre) for batch in batches])
+        return [news_genre for batch_result in batch_results for news_genre in batch_result]
+
+    async def _classify_local(self, genre_str: str, news_summaries: list[SummarisedNewsArticle],
+                              on_genre: Optional[GenreCallback] = None) -> list[str]:
+        """
+        Classifies all the summaries at once on the local model, only the summaries scored below
+        confidence_threshold go to the LLM with the local_fallback mode
+        """
+        try:
+            classifier = LocalGenreClassifier(app_config.genre_local_model)
+            local_results = await asyncio.to_thread(classifier.classify, self._genre_index(genre_str).genres,
+                                                    [news_summary.summary for news_summary in news_summaries])
+        except Exception as e:
+            print(f"Exception in local genre classifier, classifying with {app_config.genre_local_fallback} {str(e)}")
+            local_results = [(None, 0.0)] * len(news_summaries)
+
+        news_genres = [None] * len(news_summaries)
+        uncertain = []
+        for index, (news_summary, (news_genre, confidence)) in enumerate(zip(news_summaries, local_results)):
+            if news_genre and confidence >= app_config.genre_confidence_threshold:
+                news_genres[index] = news_genre
+                if on_genre:
+                    on_genre(news_summary, news_genre)
+            else:
+                uncertain.append(index)
+
+        if uncertain:
+            print(f"Local genre confidence too low for {len(uncertain)} of {len(news_summaries)} summaries")
+            fallback_genres = await self._classify_with_llm(app_config.genre_local_fallback, genre_str,
+                                                            [news_summaries[index] for index in uncertain], on_genre)
+            for index, news_genre in zip(uncertain, fallback_genres):
+                news_genres[index] = news_genre
+        return news_genres
+
+    async def _classify_with_llm(self, mode: str, genre_str: str, news_summaries: list[SummarisedNewsArticle],
+                                 on_genre: Optional[GenreCallback] = None) -> list[str]:
+        match mode:
+            case "langchain_batch":
+                return await self._classify_batched(genre_str, news_summaries, on_genre)
+            case "langchain_parallel":
+                return await self._classify_parallel(genre_str, news_summaries, on_genre)
+            case _:
+                return await self._classify_serial(genre_str, news_summaries, on_genre)
+
+    async def classify_summaries(self, genre_str: str, news_summaries: list[SummarisedNewsArticle],
+                                 on_genre: Optional[GenreCallback] = None) -> list[str]:
+        """
+        Returns the genre of every summary in the input order, using the configured assign_genre mode.
+        on_genre is called with each summary and its genre as soon as the genre is known
+        """
+        active_mode = app_config.active_assign_genre.name
+        if active_mode == "local":
+            return await self._classify_local(genre_str, news_summaries, on_genre)
+        return await self._classify_with_llm(active_mode, genre_str, news_summaries, on_genre)
+
+    async def assign_genre_to_summaries(self, news_summaries: list[SummarisedNewsArticle],
+                                        on_genre: Optional[GenreCallback] = None) -> GenreSumarisedModel:
         genres = app_config.genre_list
 
         genre_str = self.parse_genre(genres)
 
+        news_genres = await self.classify_summaries(genre_str, news_summaries, on_genre)
+
+        return self.group_by_genre(news_summaries, news_genres)
+
+    @staticmethod
+    def group_by_genre(news_summaries: list[SummarisedNewsArticle], news_genres: list[str]) -> GenreSumarisedModel:
         genre_summary = {}
 
+        # The summaries are kept whole so fields such as source_urls reach the genre summaries
+        for news_summary, news_genre in zip(news_summaries, news_genres):
+            genre_summary.setdefault(news_genre, []).append(news_summary)
 
-        for news_summary in news_summaries:
-            result = self.get_genre(genre=genre_str, content=news_summary.summary)
-            if genre_summary.get(result["genre"]):
-                genre_summary[result["genre"]].append({
-                    "url": news_summary.url,
-                    "title": news_summary.title,
-                    "summary": news_summary.summary
-                })
-            else:
-                genre_summary[result["genre"]] = [{
-                    "url": news_summary.url,
-                    "title": news_summary.title,
-                    "summary": news_summary.summary
-                }]
-        
         result = GenreSumarisedModel(categories=genre_summary)
-        return result
\ No newline at end of file
+        return result
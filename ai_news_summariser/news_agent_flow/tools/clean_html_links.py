@@ -1,7 +1,72 @@
 import re
 from bs4 import BeautifulSoup
+import hashlib
 import html
 
+try:
+    import lxml  # noqa: F401
+    _HTML_PARSER = "lxml"
+except ImportError:
+    _HTML_PARSER = "html.parser"
+
+_MARKUP = re.compile(r'<[a-zA-Z/!]')
+_MARKDOWN_LINK = re.compile(r'\[([^\]]+)\]\((https?:\/\/[^\)]+)\)')
+_URL = re.compile(r'https?://\S+')
+_WHITESPACE_AND_CONTROL = re.compile(r'[\s\x00-\x1F\x7F-\x9F]+')
+_NOISE_TAGS = ["script", "style", "noscript", "iframe", "img"]
+
+def _line_key(line: str) -> bytes:
+    return hashlib.blake2b(_WHITESPACE_AND_CONTROL.sub(' ', line).strip().lower().encode("utf-8"), digest_size=8).digest()
+
+def dedupe_boilerplate(pages: list[str]) -> tuple[list[str], int]:
+    """
+    Drops the boilerplate of one crawl (menus, cookie banners, footers): lines found on at least two different pages
+    are kept on the first page having them and dropped from the later ones. Lines repeated within a single page
+    are article content and stay. Returns the deduplicated pages and the number of bytes removed
+    """
+    if len(pages) < 2:
+        return pages, 0
+
+    page_keys = [{_line_key(line) for line in page.splitlines() if line.strip()} for page in pages]
+    page_counts = {}
+    for keys in page_keys:
+        for key in keys:
+            page_counts[key] = page_counts.get(key, 0) + 1
+
+    kept_on = {}  # boilerplate line key to the index of the page keeping it
+    deduped_pages = []
+    bytes_removed = 0
+    for index, page in enumerate(pages):
+        kept_lines = []
+        for line in page.splitlines():
+            if line.strip():
+                key = _line_key(line)
+                if page_counts[key] > 1 and kept_on.setdefault(key, index) != index:
+                    bytes_removed += len(line.encode("utf-8")) + 1
+                    continue
+            kept_lines.append(line)
+        deduped_pages.append("\n".join(kept_lines))
+    return deduped_pages, bytes_removed
+
+def clean_page(raw_content: str) -> str:
+    """
+    Single pass replacement of clean_web_content(clean_html_and_entities(raw_content)), returns one line of plain text.
+    Content without markup (Tavily mostly returns markdown) skips the HTML parser altogether
+    """
+    if _MARKUP.search(raw_content):
+        soup = BeautifulSoup(raw_content, _HTML_PARSER)
+        for tag in soup(_NOISE_TAGS):
+            tag.decompose()
+        # The parser already decodes the entities
+        text = soup.get_text(separator=' ')
+    else:
+        text = html.unescape(raw_content)
+
+    text = _MARKDOWN_LINK.sub(r'\1', text)
+    text = _URL.sub('', text)
+    # Control characters count as whitespace so words on either side of a line break stay apart
+    return _WHITESPACE_AND_CONTROL.sub(' ', text).strip()
+
 def clean_web_content(html_content: str) -> str:
     # Remove any markdown-style URLs [text](url)
     html_content = re.sub(r'\[([^\]]+)\]\((https?:\/\/[^\)]+)\)', r'\1', html_content)
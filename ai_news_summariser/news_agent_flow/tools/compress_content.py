@@ -0,0 +1,109 @@
+from collections import Counter
+from functools import lru_cache
+import math
+import re
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+(?=["\'(\[]?[A-Z0-9])')
+_WORD = re.compile(r"[a-z][a-z'\-]+")
+_CHARS_PER_TOKEN = 4
+_LEAD_SENTENCES = 3
+_LEAD_BONUS = 0.5
+
+_STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being below between both but by
+can could did do does doing down during each few for from further had has have having he her here hers him his how i if in
+into is it its itself just me more most my no nor not now of off on once only or other our out over own said same she should
+so some such than that the their them then there these they this those through to too under until up very was we were what
+when where which while who whom why will with would you your
+""".split())
+
+@lru_cache(maxsize=None)
+def _get_encoding(tokenizer: str):
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding(tokenizer)
+    except Exception as e:
+        print(f"Tokenizer {tokenizer} not available, estimating tokens from characters {str(e)}")
+        return None
+
+def count_tokens(text: str, tokenizer: str) -> int:
+    """
+    Number of tokens of the text for the tiktoken encoding, estimated from the characters when tiktoken is not installed
+    """
+    encoding = _get_encoding(tokenizer)
+    if encoding is None:
+        return math.ceil(len(text) / _CHARS_PER_TOKEN)
+    return len(encoding.encode_ordinary(text))
+
+def truncate_to_tokens(text: str, max_tokens: int, tokenizer: str) -> str:
+    """
+    Cuts the text at max_tokens tokens
+    """
+    encoding = _get_encoding(tokenizer)
+    if encoding is None:
+        return text[:max_tokens * _CHARS_PER_TOKEN]
+    tokens = encoding.encode_ordinary(text)
+    return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
+
+def split_sentences(text: str) -> list[str]:
+    return [sentence.strip() for sentence in _SENTENCE_END.split(text) if sentence.strip()]
+
+def _score_sentences(sentences: list[list[str]]) -> list[float]:
+    """
+    Scores each sentence by the document frequency of its content words, normalised by its length so long
+    sentences are not favoured, with a bonus for the lead sentences that carry the who/what/when of a news story
+    """
+    frequencies = Counter(word for words in sentences for word in words)
+    top_frequency = max(frequencies.values(), default=1)
+    scores = []
+    for position, words in enumerate(sentences):
+        score = sum(frequencies[word] for word in words) / top_frequency / math.sqrt(len(words)) if words else 0.0
+        if position < _LEAD_SENTENCES:
+            score += _LEAD_BONUS
+        scores.append(score)
+    return scores
+
+def compress_to_token_budget(text: str, max_tokens: int, tokenizer: str) -> str:
+    """
+    Keeps the most informative sentences of the text that fit in max_tokens, in their original order
+    """
+    sentences = split_sentences(text)
+    if len(sentences) <= 1:
+        return truncate_to_tokens(text, max_tokens, tokenizer)
+
+    encoding = _get_encoding(tokenizer)
+    if encoding is None:
+        sentence_tokens = [count_tokens(sentence, tokenizer) for sentence in sentences]
+    else:
+        sentence_tokens = [len(tokens) for tokens in encoding.encode_ordinary_batch(sentences)]
+    scores = _score_sentences([[word for word in _WORD.findall(sentence.lower()) if word not in _STOPWORDS]
+                               for sentence in sentences])
+
+    kept = set()
+    budget = max_tokens
+    # Greedy by score, the joining space is counted as one token
+    for index in sorted(range(len(sentences)), key=lambda i: scores[i], reverse=True):
+        if sentence_tokens[index] + 1 <= budget:
+            kept.add(index)
+            budget -= sentence_tokens[index] + 1
+
+    if not kept:
+        return truncate_to_tokens(text, max_tokens, tokenizer)
+    return " ".join(sentences[index] for index in sorted(kept))
+
+def fit_to_token_budget(text: str, max_tokens: int, tokenizer: str, extractive_compression: bool = True) -> str:
+    """
+    Returns the text unchanged when it fits in max_tokens, otherwise its extractive compression
+    or, when compression is off, the text cut at max_tokens tokens
+    """
+    if not text or max_tokens <= 0 or count_tokens(text, tokenizer) <= max_tokens:
+        return text
+    if extractive_compression:
+        return compress_to_token_budget(text, max_tokens, tokenizer)
+    return truncate_to_tokens(text, max_tokens, tokenizer)
@@ -0,0 +1,57 @@
+from functools import lru_cache
+from typing import Optional
+import difflib
+import re
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+_NEGATIONS = {"not", "no", "non"}
+
+def _normalise(genre: str) -> str:
+    return _NON_WORD.sub(" ", genre.lower().replace("&", " and ")).strip()
+
+class GenreIndex:
+    """
+    Maps the free text genre answers of the LLM onto the canonical genre list.
+
+    Answers are matched on their normalised form (case, punctuation, & and whitespace ignored), then on
+    the canonical genre named first as a whole phrase in the answer (a negated name does not count), then by fuzzy match.
+    Empty and unmatched answers give None so the caller can fall back
+    """
+    def __init__(self, genre_list: list[str], cutoff: float = 0.8):
+        self.genres = genre_list
+        self.cutoff = cutoff
+        self._by_key = {_normalise(genre): genre for genre in genre_list}
+        self._phrases = [(re.compile(rf"\b{re.escape(key)}\b"), genre) for key, genre in self._by_key.items()]
+
+    @staticmethod
+    @lru_cache(maxsize=8)
+    def for_genres(genre_list: tuple[str, ...]) -> "GenreIndex":
+        return GenreIndex(list(genre_list))
+
+    def _named_first(self, key: str) -> Optional[str]:
+        named = []
+        for phrase, genre in self._phrases:
+            for match in phrase.finditer(key):
+                preceding = key[:match.start()].split()
+                if not preceding or preceding[-1] not in _NEGATIONS:
+                    # Earliest in the answer, the longer name when two start together ("AI & Emerging Tech" over a genre inside it)
+                    named.append((match.start(), -len(match.group()), genre))
+                    break
+        return min(named)[2] if named else None
+
+    def canonical(self, answer: Optional[str]) -> Optional[str]:
+        key = _normalise(answer or "")
+        if not key:
+            return None
+        if key in self._by_key:
+            return self._by_key[key]
+        named = self._named_first(key)
+        if named:
+            return named
+        if _NEGATIONS.intersection(key.split()):
+            # "not politics" is close to "politics" but names no genre
+            return None
+        close_keys = difflib.get_close_matches(key, self._by_key, n=1, cutoff=self.cutoff)
+        if close_keys:
+            return self._by_key[close_keys[0]]
+        return None
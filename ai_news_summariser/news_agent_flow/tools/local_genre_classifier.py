@@ -0,0 +1,64 @@
+from news_agent_flow.llm import LocalModelRegistry
+
+from functools import partial
+import numpy as np
+import threading
+
+class LocalGenreClassifier:
+    """
+    Nearest prototype genre classifier on a resident sentence embedding model.
+
+    Every genre label is embedded once per model as its prototype. The summaries are embedded in one batched call
+    and scored against all the prototypes with a single matrix product, the softmax of the scaled cosine
+    similarities gives the confidence of the best genre.
+    """
+    _prototypes: dict[tuple[str, tuple[str, ...]], np.ndarray] = {}
+    _lock = threading.Lock()
+
+    def __init__(self, model: str, temperature: float = 0.05, batch_size: int = 16):
+        self.model = model
+        self.temperature = temperature
+        self.batch_size = max(1, batch_size)
+
+    def _mean_pool(self, local_pipeline, texts: list[str]) -> np.ndarray:
+        """
+        Token states averaged over the attention mask, padding added for the batch never enters the embedding
+        """
+        import torch  # already required by the transformers pipeline
+
+        encoded = local_pipeline.tokenizer(texts, padding=True, truncation=True, return_tensors="pt").to(local_pipeline.device)
+        with torch.inference_mode():
+            hidden = local_pipeline.model(**encoded)[0].float().cpu().numpy()
+        mask = encoded["attention_mask"].cpu().numpy()[..., None].astype(np.float32)
+        return (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1)
+
+    def _embed(self, texts: list[str]) -> np.ndarray:
+        """
+        Mean pooled, L2 normalised embeddings of the texts, one row per text
+        """
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        embeddings = np.concatenate([LocalModelRegistry.run_with("feature-extraction", self.model, partial(self._mean_pool, texts=batch))
+                                     for batch in batches])
+        return embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+
+    def _genre_prototypes(self, genres: list[str]) -> np.ndarray:
+        key = (self.model, tuple(genres))
+        with self._lock:
+            prototypes = self._prototypes.get(key)
+        if prototypes is None:
+            prototypes = self._embed([f"{genre} news" for genre in genres])
+            with self._lock:
+                self._prototypes[key] = prototypes
+        return prototypes
+
+    def classify(self, genres: list[str], texts: list[str]) -> list[tuple[str, float]]:
+        """
+        Returns the best genre of each text with its confidence between 0 and 1. CPU bound, callers run it in a worker thread
+        """
+        if not texts:
+            return []
+        logits = self._embed(texts) @ self._genre_prototypes(genres).T / self.temperature
+        probabilities = np.exp(logits - logits.max(axis=1, keepdims=True))
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+        best = probabilities.argmax(axis=1)
+        return [(genres[index], float(probabilities[row, index])) for row, index in enumerate(best)]
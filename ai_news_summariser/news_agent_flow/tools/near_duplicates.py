@@ -0,0 +1,66 @@
+import numpy as np
+import re
+import zlib
+
+_WORD = re.compile(r"\w+")
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+def _shingle_hashes(content: str, shingle_size: int) -> np.ndarray:
+    """
+    32 bit hashes of the distinct word shingles of the content
+    """
+    words = _WORD.findall(content.lower())
+    if len(words) < shingle_size:
+        shingles = {" ".join(words)} if words else set()
+    else:
+        shingles = {" ".join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)}
+    return np.fromiter((zlib.crc32(shingle.encode("utf-8")) for shingle in shingles), dtype=np.uint64, count=len(shingles))
+
+def minhash_signatures(contents: list[str], num_perm: int = 128, shingle_size: int = 5, seed: int = 1) -> np.ndarray:
+    """
+    MinHash signature (num_perm values) of each content, one row per content.
+    Every permutation is applied to all the shingles of a content at once
+    """
+    generator = np.random.default_rng(seed)
+    # a * hash + b stays below 2**64 with 32 bit hashes and 32 bit coefficients
+    a = generator.integers(1, 1 << 32, size=num_perm, dtype=np.uint64)
+    b = generator.integers(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+    signatures = np.full((len(contents), num_perm), _MAX_HASH, dtype=np.uint64)
+    for row, content in enumerate(contents):
+        hashes = _shingle_hashes(content, shingle_size)
+        if hashes.size:
+            permuted = (np.outer(hashes, a) + b) % _MERSENNE_PRIME & _MAX_HASH
+            signatures[row] = permuted.min(axis=0)
+    return signatures
+
+def estimated_similarity(signatures: np.ndarray) -> np.ndarray:
+    """
+    Pairwise Jaccard estimate of the signatures, the share of permutations where two minimums agree
+    """
+    return (signatures[:, None, :] == signatures[None, :, :]).mean(axis=2)
+
+def cluster_near_duplicates(contents: list[str], threshold: float = 0.8, num_perm: int = 128, shingle_size: int = 5) -> list[list[int]]:
+    """
+    Groups the indexes of the contents whose estimated similarity reaches threshold.
+    Each content joins the cluster of the first earlier representative it matches, so a cluster starts
+    with its representative and the clusters keep the input order. Empty contents are never grouped
+    """
+    if len(contents) < 2:
+        return [[index] for index in range(len(contents))]
+
+    similarity = estimated_similarity(minhash_signatures(contents, num_perm, shingle_size))
+    clusters: list[list[int]] = []
+    for index, content in enumerate(contents):
+        if content.strip():
+            for cluster in clusters:
+                representative = cluster[0]
+                if contents[representative].strip() and similarity[index, representative] >= threshold:
+                    cluster.append(index)
+                    break
+            else:
+                clusters.append([index])
+        else:
+            clusters.append([index])
+    return clusters
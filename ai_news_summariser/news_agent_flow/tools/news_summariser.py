@@ -1,15 +1,17 @@
 from crewai.tools import tool
-from transformers import pipeline
 
 from bs4 import BeautifulSoup
+from typing import Callable, Optional
 import re
 
 from news_agent_flow.models import SummarisedNewsArticle
 
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import asyncio
 from news_agent_flow.prompts import LangChainPrompts
-from news_agent_flow.llm import LLMFactory
+from news_agent_flow.llm import LLMFactory, LLMRegistry, LocalModelRegistry
 from news_agent_flow.configs import AppConfigModel
+from news_agent_flow.cache import CachedChain
+from .compress_content import fit_to_token_budget
 
 import os
 from dotenv import load_dotenv
@@ -18,24 +20,38 @@ load_dotenv()
 
 app_config = AppConfigModel.from_json_file("news_agent_flow/configs/agent_config.json")
 
-def summarise_news_article_with_cnn(news_content):
+_default_local_summarizer = "facebook/bart-large-cnn"
+
+def summarise_news_articles_with_cnn(news_contents: list[dict]) -> list[dict]:
     """
-    Summaries the content using the summarization transformers. Best to summarising the text
+    Summaries the contents using the resident summarization transformer, all articles go through the model as one batched call
     """
-    summarizer = pipeline("summarization", model="facebook/bart-large-cnn")
-    summary = summarizer(news_content["content"],
-                            max_length=1000,  # increase this to get a longer summary
-                            min_length=150,  # ensure it's not too short
-                            do_sample=False)[0]['summary_text']
-    return {
+    summarizer_config = app_config.active_summarizer
+    summaries = LocalModelRegistry.run("summarization", summarizer_config.model or _default_local_summarizer,
+                                        [news_content["content"] for news_content in news_contents],
+                                        batch_size=max(1, summarizer_config.batch_size),
+                                        truncation=True,
+                                        max_length=1000,  # increase this to get a longer summary
+                                        min_length=150,  # ensure it's not too short
+                                        do_sample=False)
+    return [{
         "url": news_content["url"],
         "title": news_content["title"],
-        "summary": summary
-    }
+        "summary": summary['summary_text']
+    } for news_content, summary in zip(news_contents, summaries)]
+
+def summarise_news_article_with_cnn(news_content):
+    """
+    Summaries the content using the summarization transformers. Best to summarising the text
+    """
+    return summarise_news_articles_with_cnn([news_content])[0]
 
 
 class NewsSummaryChain:
     def _get_chain_summarise_news_article(self):
+        return LLMRegistry.get_chain("summarise_news_article", self._build_chain_summarise_news_article)
+
+    def _build_chain_summarise_news_article(self):
         prompt = LangChainPrompts.get_individual_news_summariser_prompt()
         llm = LLMFactory.build_langchain_llm()
 
@@ -47,13 +63,13 @@ class NewsSummaryChain:
             |{"summary": lambda x: x.content}
             )
         
-        return chain_exec
+        return CachedChain(chain_exec, model=LLMRegistry.client_key("langchain"), template=prompt.pretty_repr())
     
-    def summarise_news_article(self, news_content):
+    async def summarise_news_article(self, news_content):
         content = news_content["content"]
         chain = self._get_chain_summarise_news_article()
 
-        result = chain.invoke({
+        result = await chain.ainvoke({
             "content": content
             })
         
@@ -63,33 +79,80 @@ class NewsSummaryChain:
             "summary": result["summary"]
             }
 
-def summarise_news_content(news_content):
+async def summarise_news_content(news_content):
     match app_config.active_summarizer.name:
         case "llm":
-            return NewsSummaryChain().summarise_news_article(news_content=news_content)
+            return await NewsSummaryChain().summarise_news_article(news_content=news_content)
         case "facebook_cnn":
-            summarise_news_article_with_cnn(news_content=news_content)
+            return await asyncio.to_thread(summarise_news_article_with_cnn, news_content=news_content)
         case _:
-            summarise_news_article_with_cnn(news_content=news_content)
+            return await asyncio.to_thread(summarise_news_article_with_cnn, news_content=news_content)
 
-@tool
-def summarise_news_list(news_list) -> list["SummarisedNewsArticle"]:
+async def _summarise_news_article_safe(news_content, semaphore: asyncio.Semaphore,
+                                       on_article: Optional[Callable[[dict], None]] = None):
     """
-    Can summarise the list of news articles
+    Summarises a single article, returning None instead of raising so one bad article does not fail the list
+    """
+    try:
+        async with semaphore:
+            summary = await summarise_news_content(news_content=news_content)
+    except Exception as e:
+        print(f"Exception while summarising {news_content['url']} {str(e)}")
+        return None
+
+    if on_article:
+        on_article(summary)
+    return summary
+
+def _budget_news_content(news_article) -> dict:
+    """
+    Fits the article content in the input token budget of the active summarizer, CPU bound so run in a worker thread
+    """
+    summarizer_config = app_config.active_summarizer
+    return {
+        "url": news_article["url"],
+        "title": news_article["title"],
+        "content": fit_to_token_budget(news_article["content"] or "",
+                                       summarizer_config.max_input_tokens,
+                                       summarizer_config.tokenizer,
+                                       summarizer_config.extractive_compression)
+    }
+
+async def asummarise_news_list(news_list, on_article: Optional[Callable[[dict], None]] = None) -> list["SummarisedNewsArticle"]:
+    """
+    Can summarise the list of news articles. on_article is called with each summary as soon as it is ready
 
     Args: News Article List
 
     Return: list[SummarisedNewsArticle]
     """
-
-    news_summary_dict = [ summarise_news_content({
-                        "url": news_article["url"],
-                        "title": news_article["title"],
-                        "content": news_article["content"][:10000]
-                    }) for news_article in news_list]
-    news_summary_list = [SummarisedNewsArticle(**item) for item in news_summary_dict]
+    news_contents = await asyncio.gather(*[asyncio.to_thread(_budget_news_content, news_article) for news_article in news_list])
+
+    news_summary_dict = None
+    if app_config.active_summarizer.name != "llm" and news_contents:
+        try:
+            news_summary_dict = await asyncio.to_thread(summarise_news_articles_with_cnn, news_contents)
+            if on_article:
+                for summary in news_summary_dict:
+                    on_article(summary)
+        except Exception as e:
+            print(f"Exception in batched summarisation, retrying article by article {str(e)}")
+
+    if news_summary_dict is None:
+        # Articles are summarised concurrently, gather returns them in the input order
+        semaphore = asyncio.Semaphore(max(1, app_config.summarizer_parallel))
+        news_summary_dict = await asyncio.gather(*[_summarise_news_article_safe(news_content, semaphore, on_article) for news_content in news_contents])
+
+    news_summary_list = [SummarisedNewsArticle(**item) for item in news_summary_dict if item]
     return news_summary_list
 
-    
+@tool
+def summarise_news_list(news_list) -> list["SummarisedNewsArticle"]:
+    """
+    Can summarise the list of news articles
 
+    Args: News Article List
 
+    Return: list[SummarisedNewsArticle]
+    """
+    return asyncio.run(asummarise_news_list(news_list))
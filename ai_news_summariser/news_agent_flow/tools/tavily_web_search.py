@@ -1,70 +1,146 @@
-from tavily import TavilyClient
+from tavily import AsyncTavilyClient, UsageLimitExceededError
+from tavily.errors import TimeoutError as TavilyTimeoutError
 from dotenv import load_dotenv
 from crewai.tools import tool
-from typing import List, Optional
+from typing import Any, Awaitable, Callable, Optional
 
 import json
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import asyncio
+import httpx
+import re
+from urllib.parse import parse_qsl, urlencode, urlsplit
 
 import os
 
-from .clean_html_links import clean_web_content, clean_html_and_entities
+from .clean_html_links import clean_page, dedupe_boilerplate
 from news_agent_flow.models import TavilyResponse, TavilyCrawlListModel, TavilyResultItem, TavilyCrawlItemModel
 from news_agent_flow.configs import AppConfigModel
+from news_agent_flow.utils import AdaptiveRateLimiter, MicroBatcher, call_with_retries
 
 web_crawl_config = AppConfigModel.from_json_file("news_agent_flow/configs/agent_config.json")
 
 load_dotenv()
 
+# Shared by every Tavily call of the process, whichever request or tool makes it
+_rate_limit = web_crawl_config.web_crawl_rate_limit
+tavily_limiter = AdaptiveRateLimiter(requests_per_second=_rate_limit.requests_per_second,
+                                     burst=_rate_limit.burst,
+                                     initial_parallel=web_crawl_config.web_crawl_parallel,
+                                     min_parallel=_rate_limit.min_parallel,
+                                     max_parallel=_rate_limit.max_parallel,
+                                     target_latency_seconds=_rate_limit.target_latency_ms / 1000)
 
+def _is_tavily_overload(e: Exception) -> bool:
+    return isinstance(e, (UsageLimitExceededError, TavilyTimeoutError, asyncio.TimeoutError))
 
-@tool
-def search_news_on_web(query_text: str) -> TavilyResponse:
+def _is_tavily_transient(e: Exception) -> bool:
+    if isinstance(e, httpx.HTTPStatusError):
+        return e.response.status_code >= 500
+    return _is_tavily_overload(e) or isinstance(e, httpx.TransportError)
+
+async def _call_tavily(make_call: Callable[[], Awaitable[dict]]) -> dict:
+    """
+    Calls Tavily through the shared limiter, each attempt bounded by url_timeout_ms.
+    Transient errors are retried with jittered backoff and a straggler gets a hedged duplicate after hedge_after_ms
+    """
+    resilience = web_crawl_config.web_crawl_resilience
+    return await call_with_retries(
+        lambda: tavily_limiter.run(lambda: asyncio.wait_for(make_call(), resilience.url_timeout_ms / 1000),
+                                   is_overload=_is_tavily_overload),
+        retries=resilience.retries,
+        backoff_seconds=resilience.retry_backoff_ms / 1000,
+        is_transient=_is_tavily_transient,
+        hedge_after_seconds=resilience.hedge_after_ms / 1000
+    )
+
+async def _collect_within_deadline(tasks: list[asyncio.Task], on_result: Callable[[Any], Awaitable[None]]):
+    """
+    Hands each task result to on_result in completion order until the stage deadline.
+    A url that still fails after its retries is dropped, the tasks left at the deadline are cancelled
+    """
+    handled = 0
+    try:
+        async with asyncio.timeout(web_crawl_config.web_crawl_resilience.stage_deadline_ms / 1000):
+            for task in asyncio.as_completed(tasks):
+                try:
+                    await on_result(await task)
+                except Exception as e:
+                    print(f"Dropped url after retries {type(e).__name__} {str(e)}")
+                handled += 1
+    except TimeoutError:
+        print(f"Stage deadline reached, continuing with {handled} of {len(tasks)} urls")
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def asearch_news_on_web(query_text: str) -> TavilyResponse:
     """
         Search on the web to get the latest news
     """
-    client = TavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
-    tavily_response = client.search(query_text, 
-                                    max_results=10, 
-                                    search_depth="advanced", 
-                                    time_range="day")
+    client = AsyncTavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
+    tavily_response = await _call_tavily(lambda: client.search(query_text, 
+                                                               max_results=10, 
+                                                               search_depth="advanced", 
+                                                               time_range="day"))
     tavily_web_response: TavilyResponse = TavilyResponse(**tavily_response)
 
     return tavily_web_response
 
-def _crawl_url(crawl_item, client):
-    crawl_result = client.crawl(crawl_item.url, instructions=f"find the information on {crawl_item.title}", 
-                                max_breadth=2, max_depth=2)
+@tool
+def search_news_on_web(query_text: str) -> TavilyResponse:
+    """
+        Search on the web to get the latest news
+    """
+    return asyncio.run(asearch_news_on_web(query_text))
+
+def _clean_raw_content(raw_content: str) -> str:
+    # HTML cleaning is CPU bound, callers run it in a worker thread to keep the event loop free
+    return clean_page(raw_content)
+
+def _merge_crawled_pages(crawl_result: dict) -> str:
+    """
+    Joins the pages of one crawl into a single cleaned content, dropping the boilerplate repeated across the pages
+    """
+    pages, bytes_removed = dedupe_boilerplate([item["raw_content"] if item["raw_content"] else "" for item in crawl_result["results"]])
+    if bytes_removed:
+        print(f"Removed {bytes_removed} bytes of repeated boilerplate from {len(pages)} pages of {crawl_result.get('base_url')}")
+    return _clean_raw_content(". ".join(pages))
+
+async def _crawl_url(crawl_item, client):
+    crawl_result = await _call_tavily(lambda: client.crawl(crawl_item.url, instructions=f"find the information on {crawl_item.title}", 
+                                                           max_breadth=2, max_depth=2))
     return crawl_result
 
-def _crawl_url_list(crawl_urls: list[TavilyResultItem] = []) -> TavilyCrawlListModel:
+async def _crawl_url_list(crawl_urls: list[TavilyResultItem] = [], on_article: Optional[Callable[[dict], None]] = None) -> TavilyCrawlListModel:
     """
     Crawl the urls from the web and get the complete detail from the web page crawling
     """
     results = []
-    client = TavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
-    with ThreadPoolExecutor(max_workers=web_crawl_config.web_crawl_parallel) as executor:
-        futures = [executor.submit(_crawl_url, url, client) for url in crawl_urls]
-
-        for future in as_completed(futures):
-            future_result = future.result()
-            if future_result["results"]:
-                merged_raw_content = ". ".join(item["raw_content"] if item["raw_content"] else "" for item in future_result["results"])
-                merged_raw_content = clean_web_content(clean_html_and_entities(merged_raw_content))
-                
-                last_url = future_result["base_url"] if future_result["base_url"] else future_result["results"][-1]["url"]
-                try:
-                    last_url = last_url if isinstance(last_url, str) else last_url["url"] if last_url.get("url") else ""
-                except:
-                    last_url = ""
-                
-                # Replace results with one merged item
-                future_result["results"] = [{
-                    "url": last_url,
-                    "raw_content": merged_raw_content
-                }]
-
-            results.append(future_result)
+    client = AsyncTavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
+    tasks = [asyncio.create_task(_crawl_url(url, client)) for url in crawl_urls]
+
+    async def _on_crawled(future_result):
+        if future_result["results"]:
+            merged_raw_content = await asyncio.to_thread(_merge_crawled_pages, future_result)
+            
+            last_url = future_result["base_url"] if future_result["base_url"] else future_result["results"][-1]["url"]
+            try:
+                last_url = last_url if isinstance(last_url, str) else last_url["url"] if last_url.get("url") else ""
+            except:
+                last_url = ""
+            
+            # Replace results with one merged item
+            future_result["results"] = [{
+                "url": last_url,
+                "raw_content": merged_raw_content
+            }]
+
+        results.append(future_result)
+        if on_article and future_result["results"]:
+            on_article(future_result)
+
+    await _collect_within_deadline(tasks, _on_crawled)
         
     # return [TavilyCrawlItemModel(**result) for result in results]
     with open("mock_run/json_files/crawl_result_from_api.json", "w", encoding="utf-8") as f:
@@ -72,63 +148,152 @@ def _crawl_url_list(crawl_urls: list[TavilyResultItem] = []) -> TavilyCrawlListM
 
     return results
 
-def _find_by_url(items: List[TavilyResultItem], url: str) -> Optional[TavilyResultItem]:
-    return next((item for item in items if item.url == url), None)
-
+async def _to_extract_item(extracted: dict, response: dict) -> dict:
+    """
+    Builds the crawl list item of one extracted page, the raw content is cleaned in a worker thread
+    """
+    return {
+        "base_url": extracted["url"],
+        "response_time": response["response_time"],
+        "request_id": response.get("request_id"),
+        "results" : [
+            {
+                "url": extracted["url"],
+                "raw_content": await asyncio.to_thread(_clean_raw_content, extracted["raw_content"])
+            }
+        ]
+    }
 
-def _extract_from_url(news_item, client):
-    result= client.extract(urls=[news_item.url], include_images=False)
+async def _extract_from_url(news_item, client):
+    result = await _call_tavily(lambda: client.extract(urls=[news_item.url], include_images=False))
     return result
 
-def _extract_from_urls(crawl_urls: list[TavilyResultItem] = []):
+async def _extract_from_urls(crawl_urls: list[TavilyResultItem] = [], on_article: Optional[Callable[[dict], None]] = None):
     """Extract the web content"""
 
     results = []
-    client = TavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
-    with ThreadPoolExecutor(max_workers=web_crawl_config.web_crawl_parallel) as executor:
-        futures = [executor.submit(_extract_from_url, url, client) for url in crawl_urls]
+    client = AsyncTavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
+    tasks = [asyncio.create_task(_extract_from_url(url, client)) for url in crawl_urls]
 
-        for future in futures:
-            try:
-                future_result = future.result()
-                item = future_result["results"] if future_result["results"] else None
-                if item:
-                    parent_item = _find_by_url(crawl_urls, item[0]["url"])
-
-                    dict_item = {
-                        "base_url": future_result["results"][0]["url"],
-                        "response_time": future_result["response_time"],
-                        "request_id": future_result["request_id"],
-                        "results" : [
-                            {
-                                "url": future_result["results"][0]["url"],
-                                "raw_content": clean_web_content(clean_html_and_entities(future_result["results"][0]["raw_content"]))
-                            }
-                        ]
-                    }
-
-                    results.append(dict_item)
-                else:
-                    print(f"Failed for url {future_result}")
-            except Exception as e:
-                print(f"Exception in url {str(e)}")
-                raise e
+    async def _on_extracted(future_result):
+        if future_result["results"]:
+            dict_item = await _to_extract_item(future_result["results"][0], future_result)
+
+            results.append(dict_item)
+            if on_article:
+                on_article(dict_item)
+        else:
+            print(f"Failed for url {future_result}")
+
+    # Pages are handled in completion order, a slow first url does not hold back the rest
+    await _collect_within_deadline(tasks, _on_extracted)
     
     with open("mock_run/json_files/extract_results.json", "w", encoding="utf-8") as f:
         json.dump(results, f, indent=4)
         
     return results
 
-@tool
-def get_news_content(crawl_urls: list[TavilyResultItem] = []):
+_TRACKING_PARAM = re.compile(r"^(utm_\w+|fbclid|gclid|mc_cid|mc_eid)$")
+
+def _normalise_url(url: str) -> str:
+    """
+    Url key that survives the rewrites Tavily may apply to a requested url: scheme, host case and www,
+    trailing slash, fragment and tracking parameters are ignored
+    """
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower().removeprefix("www.")
+    query = urlencode(sorted((key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                             if not _TRACKING_PARAM.match(key)))
+    path = parts.path.rstrip("/")
+    return f"{host}{path}?{query}" if query else f"{host}{path}"
+
+class ExtractBatcher(MicroBatcher):
+    """
+    Coalesces the urls requested by concurrent callers into multi url extract requests.
+
+    A request is sent once batch_size urls are pending or batch_window_seconds after the first one,
+    so a stage (or the fanned out articles of a query) needs a few round trips instead of one per url.
+    """
+    def __init__(self, batch_size: int, batch_window_seconds: float):
+        super().__init__(self._extract_batch, batch_size, batch_window_seconds)
+
+    async def extract(self, url: str) -> Optional[dict]:
+        """
+        Returns the extract response entry of the url with the response metadata, None when the page failed
+        """
+        return await self.submit(url, url)
+
+    async def _extract_batch(self, urls: dict[str, str]) -> dict[str, tuple[dict, dict]]:
+        client = AsyncTavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
+        response = await _call_tavily(lambda: client.extract(urls=list(urls), include_images=False))
+        for failed in response.get("failed_results") or []:
+            print(f"Failed for url {failed}")
+
+        # Results are matched on the normalised url, Tavily may answer with the redirected or canonical form
+        requested_by_key = {_normalise_url(url): url for url in urls}
+        matched, unmatched = {}, []
+        for extracted in response.get("results") or []:
+            url = requested_by_key.get(_normalise_url(extracted["url"]))
+            if url is None or url in matched:
+                unmatched.append(extracted)
+            else:
+                # Keyed by the requested url, which is how the search result finds its page
+                matched[url] = ({**extracted, "url": url}, response)
+
+        missing = [url for url in urls if url not in matched]
+        if len(unmatched) == 1 and len(missing) == 1:
+            print(f"Matched extract result {unmatched[0]['url']} to the only unanswered url {missing[0]}")
+            matched[missing[0]] = ({**unmatched[0], "url": missing[0]}, response)
+        elif unmatched:
+            print(f"Extract results matching no requested url {[extracted['url'] for extracted in unmatched]}, "
+                  f"unanswered urls {missing}")
+        return matched
+
+_extract_batcher = ExtractBatcher(batch_size=web_crawl_config.web_crawl_batch_size,
+                                  batch_window_seconds=web_crawl_config.web_crawl_batch_window_seconds)
+
+async def _extract_batched_url(news_item: TavilyResultItem) -> Optional[dict]:
+    batched_result = await _extract_batcher.extract(news_item.url)
+    return await _to_extract_item(*batched_result) if batched_result else None
+
+async def _extract_from_urls_batched(crawl_urls: list[TavilyResultItem] = [], on_article: Optional[Callable[[dict], None]] = None):
+    """Extract the web content with multi url requests"""
+
+    results = []
+    tasks = [asyncio.create_task(_extract_batched_url(news_item)) for news_item in crawl_urls]
+
+    async def _on_extracted(dict_item):
+        if dict_item:
+            results.append(dict_item)
+            if on_article:
+                on_article(dict_item)
+
+    await _collect_within_deadline(tasks, _on_extracted)
+
+    with open("mock_run/json_files/extract_results.json", "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=4)
+
+    return results
+
+async def aget_news_content(crawl_urls: list[TavilyResultItem] = [], on_article: Optional[Callable[[dict], None]] = None):
     """
     Web search to get the content from the url. Select the tool based on config for web crawlling. 
+    on_article is called with each cleaned page as soon as it is fetched
     """
     active_crawl = web_crawl_config.active_web_crawl
     match active_crawl.name:
         case "tavily_crawl":
-            return _crawl_url_list(crawl_urls=crawl_urls)
+            return await _crawl_url_list(crawl_urls=crawl_urls, on_article=on_article)
         case "tavily_extract":
-            return _extract_from_urls(crawl_urls=crawl_urls)
+            return await _extract_from_urls(crawl_urls=crawl_urls, on_article=on_article)
+        case "tavily_extract_batch":
+            return await _extract_from_urls_batched(crawl_urls=crawl_urls, on_article=on_article)
         case _:
-            return _extract_from_urls(crawl_urls=crawl_urls)
+            return await _extract_from_urls(crawl_urls=crawl_urls, on_article=on_article)
+
+@tool
+def get_news_content(crawl_urls: list[TavilyResultItem] = []):
+    """
+    Web search to get the content from the url. Select the tool based on config for web crawlling. 
+    """
+    return asyncio.run(aget_news_content(crawl_urls=crawl_urls))
\ No newline at end of file
@@ -1,3 +1,6 @@
 from .logger import cleanup_old_logs, log_node
+from .rate_limiter import AdaptiveRateLimiter
+from .resilience import call_with_retries, hedged_call
+from .micro_batcher import MicroBatcher
 
-__all__ = ["cleanup_old_logs", "log_node"]
\ No newline at end of file
+__all__ = ["cleanup_old_logs", "log_node", "AdaptiveRateLimiter", "call_with_retries", "hedged_call", "MicroBatcher"]
\ No newline at end of file
@@ -2,6 +2,8 @@
 
 import os
 import json
+import asyncio
+import functools
 from datetime import datetime, timedelta, timezone
 from pydantic import BaseModel
 
@@ -56,6 +58,19 @@ def cleanup_old_logs(days: int = 0, hours: int = 0, minutes: int = 0):
 
 def log_node(node_name: str):
     def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(state: dict):
+                try:
+                    result = await func(state)
+                    _log_node_activity(node_name, input_data=state, output_data=result)
+                    return result
+                except Exception as e:
+                    _log_node_activity(node_name, input_data=state, error=str(e))
+                    state['has_error'] = True
+                    return state
+            return async_wrapper
+
         def wrapper(state: dict):
             try:
                 result = func(state)
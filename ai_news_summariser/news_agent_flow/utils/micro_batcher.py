@@ -0,0 +1,71 @@
+from typing import Any, Awaitable, Callable, Hashable, Optional
+import asyncio
+
+class MicroBatcher:
+    """
+    Coalesces the items submitted by concurrent callers into one call of batch_fn.
+
+    A batch is sent once batch_size keys are pending or batch_window_seconds after the first one, callers submitting
+    the same key share its entry. batch_fn gets the key to item mapping and returns the key to result mapping,
+    a key missing from the answer resolves to None and an exception fails every caller of the batch.
+    batch_fn runs on behalf of several callers, so it must not emit on the stream of any one of them.
+    """
+    def __init__(self, batch_fn: Callable[[dict[Hashable, Any]], Awaitable[dict[Hashable, Any]]],
+                 batch_size: int, batch_window_seconds: float):
+        self.batch_fn = batch_fn
+        self.batch_size = max(1, batch_size)
+        self.batch_window_seconds = batch_window_seconds
+        self._loop = None
+
+    def _bind_loop(self):
+        # Futures belong to one event loop, state is reset when called from another one
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._pending: dict[Hashable, tuple[Any, list[asyncio.Future]]] = {}
+            self._flush_handle = None
+            # The loop only keeps weak references to tasks, these keep the batches in flight alive
+            self._tasks: set[asyncio.Task] = set()
+        return loop
+
+    async def submit(self, key: Hashable, item: Any) -> Optional[Any]:
+        """
+        Returns the result of the item once its batch is answered
+        """
+        loop = self._bind_loop()
+        future = loop.create_future()
+        if key in self._pending:
+            self._pending[key][1].append(future)
+        else:
+            self._pending[key] = (item, [future])
+
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_window_seconds, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        pending, self._pending = self._pending, {}
+        if pending:
+            task = self._loop.create_task(self._send(pending))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, pending: dict[Hashable, tuple[Any, list[asyncio.Future]]]):
+        try:
+            results = await self.batch_fn({key: item for key, (item, _) in pending.items()})
+        except Exception as e:
+            for _, futures in pending.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+
+        for key, (_, futures) in pending.items():
+            for future in futures:
+                if not future.done():
+                    future.set_result(results.get(key))
@@ -0,0 +1,119 @@
+from collections import deque
+from typing import Awaitable, Callable, TypeVar
+import asyncio
+import threading
+import time
+
+T = TypeVar("T")
+
+class AdaptiveRateLimiter:
+    """
+    Process wide limiter for calls to one upstream service.
+
+    A token bucket caps the request rate at requests_per_second (bursts up to burst), and an AIMD controller
+    caps the calls in flight: the limit grows by about one per round of calls answered within target_latency_seconds
+    and is multiplied by decrease_factor when the upstream throttles or times out.
+    State is guarded by a thread lock so one limiter is shared by every request and event loop of the process.
+    """
+    def __init__(self, requests_per_second: float, burst: int, initial_parallel: int, min_parallel: int,
+                 max_parallel: int, target_latency_seconds: float, decrease_factor: float = 0.5):
+        self.requests_per_second = requests_per_second
+        self.burst = max(1, burst)
+        self.min_parallel = max(1, min_parallel)
+        self.max_parallel = max(self.min_parallel, max_parallel)
+        self.target_latency_seconds = target_latency_seconds
+        self.decrease_factor = decrease_factor
+
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._refilled_at = time.monotonic()
+        self._limit = float(min(max(initial_parallel, self.min_parallel), self.max_parallel))
+        self._in_flight = 0
+        self._waiters: deque = deque()
+        self.throttled = 0
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    async def _take_token(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.requests_per_second)
+                self._refilled_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_seconds = (1 - self._tokens) / self.requests_per_second
+            await asyncio.sleep(wait_seconds)
+
+    async def _acquire_slot(self):
+        with self._lock:
+            if self._in_flight < self.limit and not self._waiters:
+                self._in_flight += 1
+                return
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._waiters.append((loop, future))
+        # The releasing call hands its slot over by resolving the future
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release_slot()
+            raise
+
+    def _handover(self, future: asyncio.Future):
+        if future.done():
+            # The waiter was cancelled before the slot reached it, pass the slot on
+            self._release_slot()
+        else:
+            future.set_result(None)
+
+    def _release_slot(self):
+        with self._lock:
+            self._in_flight -= 1
+            while self._waiters and self._in_flight < self.limit:
+                loop, future = self._waiters.popleft()
+                if future.done():
+                    continue
+                self._in_flight += 1
+                loop.call_soon_threadsafe(self._handover, future)
+
+    def _on_success(self, latency_seconds: float):
+        if latency_seconds <= self.target_latency_seconds:
+            with self._lock:
+                self._limit = min(self.max_parallel, self._limit + 1 / self._limit)
+
+    def _on_overload(self):
+        with self._lock:
+            self.throttled += 1
+            self._limit = max(self.min_parallel, self._limit * self.decrease_factor)
+
+    async def run(self, call: Callable[[], Awaitable[T]], is_overload: Callable[[Exception], bool] = lambda e: False) -> T:
+        """
+        Awaits call once a token and a concurrency slot are free. is_overload tells which exceptions mean
+        the upstream is throttling or saturated
+        """
+        await self._take_token()
+        await self._acquire_slot()
+        started_at = time.monotonic()
+        try:
+            result = await call()
+        except Exception as e:
+            if is_overload(e):
+                self._on_overload()
+            raise
+        finally:
+            self._release_slot()
+        self._on_success(time.monotonic() - started_at)
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "in_flight": self._in_flight,
+            "waiting": len(self._waiters),
+            "throttled": self.throttled
+        }
@@ -0,0 +1,48 @@
+from typing import Awaitable, Callable, Optional, TypeVar
+import asyncio
+import random
+
+T = TypeVar("T")
+
+async def hedged_call(make_call: Callable[[], Awaitable[T]], hedge_after_seconds: Optional[float] = None) -> T:
+    """
+    Awaits make_call, starting one duplicate when the first call is still running after hedge_after_seconds.
+    The first successful answer wins and the other call is cancelled
+    """
+    first = asyncio.ensure_future(make_call())
+    if not hedge_after_seconds:
+        return await first
+
+    pending = {first}
+    try:
+        done, _ = await asyncio.wait(pending, timeout=hedge_after_seconds)
+        if done:
+            return first.result()
+
+        pending.add(asyncio.ensure_future(make_call()))
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+async def call_with_retries(make_call: Callable[[], Awaitable[T]], retries: int, backoff_seconds: float,
+                            is_transient: Callable[[Exception], bool],
+                            hedge_after_seconds: Optional[float] = None) -> T:
+    """
+    Awaits make_call (hedged when hedge_after_seconds is set), retrying transient errors up to retries times
+    with exponential backoff and full jitter
+    """
+    for attempt in range(retries + 1):
+        try:
+            return await hedged_call(make_call, hedge_after_seconds)
+        except Exception as e:
+            if attempt >= retries or not is_transient(e):
+                raise
+            await asyncio.sleep(random.uniform(0, backoff_seconds * 2 ** attempt))
@@ -1,6 +1,7 @@
 from fastapi import FastAPI, HTTPException
-from starlette.responses import StreamingResponse
+from starlette.responses import StreamingResponse, Response
 import asyncio
+import json
 from pydantic import BaseModel
 from typing import List
 import os
@@ -13,7 +14,7 @@ from rest_api.utils import (
     cleanup_old_logs,
     log_with_context
 )
-from rest_api.business_logic import NewsSummarizer
+from rest_api.business_logic import NewsSummarizer, snapshot_etag
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from rest_api.configs import ConfigModel
@@ -62,6 +63,28 @@ async def news_summariser_endpoint(query: str, request: Request):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/news_summariser/snapshot")
+async def news_summariser_snapshot_endpoint(query: str, request: Request):
+    """
+    All the stored stages of a query as one JSON document. Send the returned ETag back in If-None-Match
+    to get a 304 without a body while the stored results are unchanged
+    """
+    try:
+        snapshot = await news_summarizer.get_snapshot(query)
+    except Exception as e:
+        log_with_context("api_error", {"event": "Snapshot failed"}, source="storage", request_id=request.state.request_id, error=str(e))
+        raise HTTPException(status_code=500, detail=str(e))
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail=f"No stored results for {query}")
+
+    body = json.dumps(snapshot).encode("utf-8")
+    headers = {"ETag": snapshot_etag(body), "Cache-Control": "no-cache", "X-Request-ID": request.state.request_id}
+    if_none_match = request.headers.get("if-none-match", "")
+    if if_none_match.strip() == "*" or headers["ETag"] in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
 # Stream Testing code
 async def _event_stream():
     for i in range(10):
@@ -1,3 +1,3 @@
-from .news_summariser import NewsSummarizer
+from .news_summariser import NewsSummarizer, snapshot_etag
 
-__all__ = ["NewsSummarizer"]
\ No newline at end of file
+__all__ = ["NewsSummarizer", "snapshot_etag"]
\ No newline at end of file
@@ -0,0 +1,65 @@
+import asyncio
+from typing import AsyncIterator
+
+_CLOSED = object()
+_OVERFLOW = object()
+
+class RunBroadcast:
+    """
+    Fans the events of one pipeline run out to every client asking for the same query.
+
+    Published events are kept in a replay buffer, a client attaching mid run first gets every event it missed
+    and then the live ones. Each subscriber reads the live events from its own queue bounded to max_pending,
+    a subscriber that falls that far behind is dropped instead of holding the run back or growing memory.
+    """
+    def __init__(self, max_pending: int = 256):
+        self.max_pending = max(1, max_pending)
+        self.task: asyncio.Task | None = None
+        self._events: list[dict] = []
+        self._subscribers: set[asyncio.Queue] = set()
+        self._closed = False
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, event: dict):
+        self._events.append(event)
+        for queue in list(self._subscribers):
+            if queue.qsize() >= self.max_pending:
+                # The spare slot of the queue always has room for the marker
+                self._subscribers.discard(queue)
+                queue.put_nowait(_OVERFLOW)
+            else:
+                queue.put_nowait(event)
+
+    def close(self):
+        self._closed = True
+        for queue in self._subscribers:
+            queue.put_nowait(_CLOSED)
+        self._subscribers.clear()
+
+    async def subscribe(self) -> AsyncIterator[dict]:
+        """
+        Yields the events published so far, then the live events until the run closes
+        """
+        # Taking the replay and registering happen without awaiting, so no event is missed or sent twice
+        replay = list(self._events)
+        queue = None
+        if not self._closed:
+            queue = asyncio.Queue(maxsize=self.max_pending + 1)
+            self._subscribers.add(queue)
+        try:
+            for event in replay:
+                yield event
+            while queue is not None:
+                event = await queue.get()
+                if event is _CLOSED:
+                    return
+                if event is _OVERFLOW:
+                    yield {"error": "Client fell too far behind the live run"}
+                    return
+                yield event
+        finally:
+            if queue is not None:
+                self._subscribers.discard(queue)
@@ -9,15 +9,36 @@ from rest_api.utils import (
     log_with_context
 )
 from news_agent_flow import create_news_agent_with_final_summary_flow
+from news_agent_flow.agents import NewsSummariser
+from news_agent_flow.models import SummarisedNewsArticle
 from rest_api.storage import StorageManager
+from .broadcast import RunBroadcast
+from .query_units import normalise_query_key, merge_stage_results, merged_stage_key, units_fingerprint
+import hashlib
 import json
 from datetime import datetime, timezone
-import time
+from typing import Optional
 
 undecided_lit = "undecided"
 storage_lit = "storage"
 live_lit = "live"
 
+def _article_items(node_result) -> list:
+    """
+    Splits a stored node result into its per article items, genre tagged results carry the genre on each item
+    """
+    if isinstance(node_result, list):
+        return node_result
+    if isinstance(node_result, dict) and isinstance(node_result.get("categories"), dict):
+        return [{**article, "genre": genre} for genre, articles in node_result["categories"].items() for article in articles]
+    return []
+
+def _sse(output: dict) -> str:
+    return f"data:{json.dumps(output)}\n\n"
+
+def snapshot_etag(body: bytes) -> str:
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
 class NewsSummarizer:
     def __init__(self, be_config):
         try:
@@ -27,7 +48,7 @@ class NewsSummarizer:
             log_with_context("app_init", {"event": "Failed to load backend config"}, source=undecided_lit, request_id="NewsSummarizer_init", error=str(e))
             raise e
 
-        self.in_progress_queries: Dict[str, asyncio.Lock] = {}  # query -> Lock
+        self.in_flight: Dict[str, RunBroadcast] = {}  # query -> broadcast of its running pipeline
         self.partial_results: Dict[str, List[NewsSummaryResult]] = {}  # query -> partial results list
         self.complete_results: Dict[str, List[NewsSummaryResult]] = {}  # query -> complete results list
 
@@ -54,27 +75,161 @@ class NewsSummarizer:
             raise e
 
 
+    def _unit_keys(self, query_key: str) -> list[str]:
+        """
+        Splits the query into per genre units when configured, each unit is run, stored and shared on its own
+        """
+        return query_key.split(",") if self.be_config.per_genre_units and query_key else [query_key]
+
+    async def _summarise_merged_genre(self, genre: str, all_summary: list[dict]) -> str:
+        """
+        One final summary over the articles several genre units found for the same genre
+        """
+        genre_summary = await NewsSummariser().summarise_single_genre(genre, [SummarisedNewsArticle(**item) for item in all_summary])
+        return genre_summary["final_summary"]
+
+    async def _merged_final_summary(self, query_key: str, unit_results: list, request_id: str) -> dict:
+        """
+        Final summaries of the genre units merged into one per genre. Genres summarised again are only paid for once:
+        the merge is stored under the query key with the fingerprint of the unit results it was built from
+        """
+        stage_key = merged_stage_key(query_key, "final_genre_summary")
+        fingerprint = units_fingerprint(unit_results)
+        try:
+            stored = await StorageManager.get_document(stage_key)
+            if stored and stored.units_fingerprint == fingerprint:
+                return stored.result
+        except Exception as e:
+            log_with_context("news_agent_stream", {"event": "Error fetching merged final summary", "query_key": query_key}, source=storage_lit, request_id=request_id, error=str(e))
+
+        merged = await merge_stage_results(unit_results, self._summarise_merged_genre)
+        try:
+            await StorageManager.insert_document(NewsSummaryResult(genre=stage_key, query_key=stage_key,
+                                                                   result=merged, units_fingerprint=fingerprint))
+        except Exception as e:
+            log_with_context("news_agent_stream", {"event": "Failed to store merged final summary", "query_key": query_key}, source=storage_lit, request_id=request_id, error=str(e))
+        return merged
+
+    async def get_snapshot(self, query: str) -> Optional[dict]:
+        """
+        Returns every stored stage of the query as one document, None when nothing is stored for it. Reads storage only:
+        a stage of a per genre query is included once every unit has stored it, its final summary once the merge
+        of the current unit results is stored by a stream request
+        """
+        query_key = normalise_query_key(query)
+        unit_keys = self._unit_keys(query_key)
+        result_key_flow = self.be_config.stream_sequence
+        results = await asyncio.gather(*[StorageManager.get_document(f"{unit_key}_{keys_flow}")
+                                         for keys_flow in result_key_flow for unit_key in unit_keys])
+        stages = {}
+        for index, keys_flow in enumerate(result_key_flow):
+            unit_results = results[index * len(unit_keys):(index + 1) * len(unit_keys)]
+            if all(unit_results):
+                stages[keys_flow] = unit_results
+
+        merged_stages = {}
+        for keys_flow, unit_results in list(stages.items()):
+            if len(unit_results) == 1:
+                merged_stages[keys_flow] = unit_results[0].result
+            elif keys_flow != "final_genre_summary":
+                merged_stages[keys_flow] = await merge_stage_results([result.result for result in unit_results])
+            else:
+                merged = await StorageManager.get_document(merged_stage_key(query_key, keys_flow))
+                if merged and merged.units_fingerprint == units_fingerprint([result.result for result in unit_results]):
+                    merged_stages[keys_flow] = merged.result
+                else:
+                    del stages[keys_flow]
+        if not stages:
+            return None
+
+        return {
+            "query_key": query_key,
+            "complete": len(stages) == len(result_key_flow),
+            "created_at": max(result.createdAt for unit_results in stages.values() for result in unit_results).isoformat(),
+            "stages": merged_stages
+        }
+
     @log_node("news_agent_stream")
     async def news_agent_stream(self, state: dict):
-        outer_stream_lit = "news_agent_stream"
         query = state.get("query", "")
         request_id = state.get("request_id", "")
-        query_key = ",".join(sorted(query.split(","))).strip(",").strip(' ')
-        event_node_map = self.be_config.stream_events
-        result_key_flow = self.be_config.stream_sequence
+        unit_keys = self._unit_keys(normalise_query_key(query))
 
-        log_with_context(outer_stream_lit, {"event": "Processing query", "query_key": query_key}, source=undecided_lit, request_id=request_id)
+        outputs = self._stream_query(unit_keys[0], request_id) if len(unit_keys) == 1 \
+                  else self._stream_units(normalise_query_key(query), unit_keys, request_id)
+        async for output in outputs:
+            yield _sse(output)
 
-        if query_key not in self.in_progress_queries:
-            self.in_progress_queries[query_key] = asyncio.Lock()
-        lock = self.in_progress_queries[query_key]
+    async def _stream_units(self, query_key: str, unit_keys: list[str], request_id: str):
+        """
+        Streams the genre units of a query concurrently, each from storage, from its run in flight or from a new run.
+        Article events pass through as they come, a stage is sent merged once every unit has produced it
+        """
+        result_key_flow = self.be_config.stream_sequence
+        unit_outputs = asyncio.Queue()
 
+        async def _pump(unit_key):
+            try:
+                async for output in self._stream_query(unit_key, request_id):
+                    await unit_outputs.put((unit_key, output))
+            except Exception as e:
+                await unit_outputs.put((unit_key, {"error": str(e)}))
+            finally:
+                await unit_outputs.put((unit_key, None))
+
+        log_with_context("news_agent_stream", {"event": "Streaming genre units", "units": unit_keys}, source=undecided_lit, request_id=request_id)
+        tasks = [asyncio.create_task(_pump(unit_key)) for unit_key in unit_keys]
+        stage_results = {keys_flow: {} for keys_flow in result_key_flow}
+        next_stage = 0
+        running = set(unit_keys)
         try:
-            is_all_values_present = await StorageManager.get_all_documents_count(f"{query_key}")
-            print(f"Returned {is_all_values_present} {is_all_values_present and is_all_values_present == len(result_key_flow)}")
-        except Exception as e:
-            log_with_context(outer_stream_lit, {"event": "Error fetching stored documents", "query_key": query_key}, source=undecided_lit, request_id=request_id, error=str(e))
-            is_all_values_present = False
+            while running:
+                unit_key, output = await unit_outputs.get()
+                if output is None:
+                    running.discard(unit_key)
+                    continue
+                if output.get("error"):
+                    # The other units go on in their own runs and are stored for the next request
+                    yield output
+                    return
+                if output["node_name"] not in stage_results:
+                    yield output
+                    continue
+
+                stage_results[output["node_name"]][unit_key] = output["node_result"]
+                while next_stage < len(result_key_flow) and len(stage_results[result_key_flow[next_stage]]) == len(unit_keys):
+                    keys_flow = result_key_flow[next_stage]
+                    unit_results = [stage_results[keys_flow][unit_key] for unit_key in unit_keys]
+                    yield {
+                        "node_name": keys_flow,
+                        "node_result": await self._merged_final_summary(query_key, unit_results, request_id)
+                                       if keys_flow == "final_genre_summary" else await merge_stage_results(unit_results)
+                    }
+                    next_stage += 1
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _stream_query(self, query_key: str, request_id: str):
+        """
+        Streams the outputs of one query key, from storage when all its stages are stored, otherwise from its run
+        """
+        outer_stream_lit = "news_agent_stream"
+        custom_events = self.be_config.stream_custom_events
+        article_events = self.be_config.stream_article_events
+        result_key_flow = self.be_config.stream_sequence
+
+        log_with_context(outer_stream_lit, {"event": "Processing query", "query_key": query_key}, source=undecided_lit, request_id=request_id)
+
+        # A query already running is joined as it is, its results are not stored yet
+        is_all_values_present = False
+        if query_key not in self.in_flight:
+            try:
+                is_all_values_present = await StorageManager.get_all_documents_count(f"{query_key}")
+                print(f"Returned {is_all_values_present} {is_all_values_present and is_all_values_present == len(result_key_flow)}")
+            except Exception as e:
+                log_with_context(outer_stream_lit, {"event": "Error fetching stored documents", "query_key": query_key}, source=undecided_lit, request_id=request_id, error=str(e))
+                is_all_values_present = False
 
         if is_all_values_present and is_all_values_present == len(result_key_flow):
             log_with_context(outer_stream_lit, {"event": "Serving cached results", "query_key": query_key}, source=storage_lit, request_id=request_id)
@@ -82,117 +237,163 @@ class NewsSummarizer:
                 try:
                     result = await StorageManager.get_document(f"{query_key}_{keys_flow}")
                     if result:
+                        # Replay the per article events a live run emits ahead of the node result
+                        article_event = article_events.get(keys_flow)
+                        if article_event in custom_events:
+                            for article in _article_items(result.result):
+                                output = {
+                                    "node_name": article_event,
+                                    "node_result": article
+                                }
+                                yield output
+
                         output = {
                             "node_name": keys_flow,
                             "node_result": result.result
                         }
-                        yield f"data:{json.dumps(output)}\n\n"
+                        yield output
                         log_with_context(outer_stream_lit, {"event": "Yielded streaming data", "query_key": query_key}, source=storage_lit, request_id=request_id)
-                        time.sleep(5)
+                        # Stored stages are replayed at once unless pacing is configured for the UI
+                        if self.be_config.cache_replay_delay_seconds > 0:
+                            await asyncio.sleep(self.be_config.cache_replay_delay_seconds)
                 except Exception as e:
                     log_with_context(outer_stream_lit, {"event": "Error streaming cached document", "key": keys_flow, "query_key": query_key}, source=storage_lit, request_id=request_id, error=str(e))
             return
 
-        async with lock:
-            self.partial_results[query_key] = []
-            self.complete_results[query_key] = []
+        # Single flight: a request for a query already running attaches to that run instead of starting another
+        flight = self.in_flight.get(query_key)
+        if flight is None:
+            flight = RunBroadcast(self.be_config.subscriber_buffer_size)
+            self.in_flight[query_key] = flight
+            # The run belongs to no client, it goes on and stores its results when its first client disconnects
+            flight.task = asyncio.create_task(self._run_pipeline(query_key, flight, request_id))
+        else:
+            log_with_context(outer_stream_lit, {"event": "Attached to in flight run", "query_key": query_key,
+                                                "subscribers": flight.subscriber_count}, source=live_lit, request_id=request_id)
 
-            streaming_completed = False
-            streaming_error = None
+        async for output in flight.subscribe():
+            yield output
 
-            try:
-                await StorageManager.cleanup(f"{query_key}")
-                log_with_context(outer_stream_lit, {"event": "Cleaned up old data", "query_key": query_key}, source=live_lit, request_id=request_id)
+    async def _run_pipeline(self, query_key: str, broadcast: RunBroadcast, request_id: str):
+        """
+        Runs the pipeline of the query once, publishing every streamed event to the clients attached to the broadcast.
+        Results are stored before the broadcast closes, so a client arriving after it gets them from storage
+        """
+        outer_stream_lit = "news_agent_stream"
+        event_node_map = self.be_config.stream_events
+        custom_events = self.be_config.stream_custom_events
 
-                events = self.graph_final_summary.stream({"query": f"latest news on {query_key}"}, stream_mode="updates")
-                log_with_context(outer_stream_lit, {"event": "Started streaming news agent flow", "query_key": query_key}, source=live_lit, request_id=request_id)
+        self.partial_results[query_key] = []
+        self.complete_results[query_key] = []
 
-                for event in events:
-                    for key, value in event.items():
-                        log_with_context(outer_stream_lit, {"event": "Received event key", "key": key}, source=live_lit, request_id=request_id)
+        streaming_completed = False
+        streaming_error = None
 
-                        if key == "__end__":
-                            streaming_completed = True
-                            log_with_context(outer_stream_lit, {"event": "Reached end of stream", "query_key": query_key}, source=live_lit, request_id=request_id)
-                            break
+        try:
+            await StorageManager.cleanup(f"{query_key}")
+            log_with_context(outer_stream_lit, {"event": "Cleaned up old data", "query_key": query_key}, source=live_lit, request_id=request_id)
 
-                        if value.get("has_error"):
-                            streaming_error = str(value["error_message"])
-                            error = {"error": streaming_error}
-                            log_with_context(outer_stream_lit, {"event": "Streaming error", "query_key": query_key}, source=live_lit, request_id=request_id, error=streaming_error)
-                            yield f"data:{json.dumps(error)}\n\n"
-                            break
-
-                        if key in event_node_map:
-                            try:
-                                result_value = (
-                                    [item if isinstance(item, dict) else item.model_dump()
-                                     for item in value[event_node_map[key]]]
-                                    if isinstance(value[event_node_map[key]], list)
-                                    else value[event_node_map[key]].model_dump()
-                                )
-                            except Exception as e:
-                                log_with_context(outer_stream_lit, {"event": "Error extracting result value", "key": key}, source=live_lit, request_id=request_id, error=str(e))
-                                result_value = None
+            events = self.graph_final_summary.astream({"query": f"latest news on {query_key}"}, stream_mode=["updates", "custom"])
+            log_with_context(outer_stream_lit, {"event": "Started streaming news agent flow", "query_key": query_key}, source=live_lit, request_id=request_id)
 
+            async for stream_mode, event in events:
+                if stream_mode == "custom":
+                    # Partial results emitted from inside a node, streamed as they arrive and never stored
+                    for key, value in event.items():
+                        if key in custom_events:
                             output = {
                                 "node_name": key,
-                                "node_result": result_value if key != "crawl_the_news" else ""
+                                "node_result": value
                             }
+                            broadcast.publish(output)
+                            log_with_context(outer_stream_lit, {"event": "Yielded custom streaming data", "node": key}, source=live_lit, request_id=request_id)
+                    continue
+
+                for key, value in event.items():
+                    log_with_context(outer_stream_lit, {"event": "Received event key", "key": key}, source=live_lit, request_id=request_id)
 
-                            yield f"data:{json.dumps(output)}\n\n"
-                            log_with_context(outer_stream_lit, {"event": "Yielded streaming data", "node": key}, source=live_lit, request_id=request_id)
-
-                            if key != "crawl_the_news" and result_value is not None:
-                                try:
-                                    document = {
-                                        "genre": f"{query_key}_{key}",
-                                        "result": result_value,
-                                        "createdAt": datetime.now(timezone.utc)
-                                    }
-                                    obj = NewsSummaryResult(**document)
-                                    self.partial_results[query_key].append(obj)
-                                    self.complete_results[query_key].append(obj)
-                                except Exception as e:
-                                    log_with_context(outer_stream_lit, {"event": "Failed to create/store NewsSummaryResult", "key": key}, source=live_lit, request_id=request_id, error=str(e))
-
-                            if key == "final_genre_summary":
-                                streaming_completed = True
-                                log_with_context(outer_stream_lit, {"event": "streaming is completed successfully", "node": key}, source=live_lit, request_id=request_id)
-
-                        await asyncio.sleep(0.5)
-
-                    if streaming_completed or streaming_error:
+                    if key == "__end__":
+                        streaming_completed = True
+                        log_with_context(outer_stream_lit, {"event": "Reached end of stream", "query_key": query_key}, source=live_lit, request_id=request_id)
                         break
 
-            except Exception as e:
-                streaming_error = str(e)
-                error = {"error": streaming_error}
-                yield f"data:{json.dumps(error)}\n\n"
-                log_with_context(outer_stream_lit, {"event": "Streaming error", "query_key": query_key}, source=live_lit, request_id=request_id, error=streaming_error)
+                    if value.get("has_error"):
+                        streaming_error = str(value["error_message"])
+                        error = {"error": streaming_error}
+                        log_with_context(outer_stream_lit, {"event": "Streaming error", "query_key": query_key}, source=live_lit, request_id=request_id, error=streaming_error)
+                        broadcast.publish(error)
+                        break
+
+                    if key in event_node_map:
+                        try:
+                            result_value = (
+                                [item if isinstance(item, dict) else item.model_dump()
+                                 for item in value[event_node_map[key]]]
+                                if isinstance(value[event_node_map[key]], list)
+                                else value[event_node_map[key]].model_dump()
+                            )
+                        except Exception as e:
+                            log_with_context(outer_stream_lit, {"event": "Error extracting result value", "key": key}, source=live_lit, request_id=request_id, error=str(e))
+                            result_value = None
+
+                        output = {
+                            "node_name": key,
+                            "node_result": result_value if key != "crawl_the_news" else ""
+                        }
+
+                        broadcast.publish(output)
+                        log_with_context(outer_stream_lit, {"event": "Yielded streaming data", "node": key}, source=live_lit, request_id=request_id)
+
+                        if key != "crawl_the_news" and result_value is not None:
+                            try:
+                                document = {
+                                    "genre": f"{query_key}_{key}",
+                                    "query_key": query_key,
+                                    "result": result_value,
+                                    "createdAt": datetime.now(timezone.utc)
+                                }
+                                obj = NewsSummaryResult(**document)
+                                self.partial_results[query_key].append(obj)
+                                self.complete_results[query_key].append(obj)
+                            except Exception as e:
+                                log_with_context(outer_stream_lit, {"event": "Failed to create/store NewsSummaryResult", "key": key}, source=live_lit, request_id=request_id, error=str(e))
+
+                        if key == "final_genre_summary":
+                            streaming_completed = True
+                            log_with_context(outer_stream_lit, {"event": "streaming is completed successfully", "node": key}, source=live_lit, request_id=request_id)
+
+                if streaming_completed or streaming_error:
+                    break
+
+        except Exception as e:
+            streaming_error = str(e)
+            error = {"error": streaming_error}
+            broadcast.publish(error)
+            log_with_context(outer_stream_lit, {"event": "Streaming error", "query_key": query_key}, source=live_lit, request_id=request_id, error=streaming_error)
+            try:
+                await StorageManager.cleanup(f"{query_key}")
+                log_with_context(outer_stream_lit, {"event": "Cleanup after streaming error", "query_key": query_key}, source=undecided_lit, request_id=request_id)
+            except Exception as cleanup_err:
+                log_with_context(outer_stream_lit, {"event": "Cleanup failed after streaming error", "query_key": query_key}, source=undecided_lit, request_id=request_id , error=str(cleanup_err))
+
+        finally:
+            if streaming_completed and not streaming_error and (query_key in self.complete_results):
                 try:
-                    await StorageManager.cleanup(f"{query_key}")
-                    log_with_context(outer_stream_lit, {"event": "Cleanup after streaming error", "query_key": query_key}, source=undecided_lit, request_id=request_id)
-                except Exception as cleanup_err:
-                    log_with_context(outer_stream_lit, {"event": "Cleanup failed after streaming error", "query_key": query_key}, source=undecided_lit, request_id=request_id , error=str(cleanup_err))
+                    await StorageManager.insert_documents(self.complete_results[query_key])
 
-            finally:
-                if streaming_completed and not streaming_error and (query_key in self.complete_results):
-                    try:
-                        for obj in self.complete_results[query_key]:
-                            await StorageManager.insert_document(obj)
-                        
-                        log_with_context(outer_stream_lit, {"event": "Successfully saved results", "count": len(self.complete_results[query_key]), "query_key": query_key}, source=undecided_lit, request_id=request_id)
-                    except Exception as e:
-                        log_with_context(outer_stream_lit, {"event": "Failed to store results", "query_key": query_key}, source=undecided_lit, request_id=request_id , error=str(e))
+                    log_with_context(outer_stream_lit, {"event": "Successfully saved results", "count": len(self.complete_results[query_key]), "query_key": query_key,
+                                                        "storage_stats": StorageManager.stats()}, source=undecided_lit, request_id=request_id)
+                except Exception as e:
+                    log_with_context(outer_stream_lit, {"event": "Failed to store results", "query_key": query_key}, source=undecided_lit, request_id=request_id , error=str(e))
+            else:
+                if streaming_error:
+                    log_with_context(outer_stream_lit, {"event": "Not saving results due to streaming error", "query_key": query_key}, source=undecided_lit, 
+                                     request_id=request_id , error=streaming_error)
                 else:
-                    if streaming_error:
-                        log_with_context(outer_stream_lit, {"event": "Not saving results due to streaming error", "query_key": query_key}, source=undecided_lit, 
-                                         request_id=request_id , error=streaming_error)
-                    else:
-                        log_with_context(outer_stream_lit, {"event": "Not saving results - streaming incomplete", "query_key": query_key}, source=undecided_lit, request_id=request_id)
-
-                self.partial_results.pop(query_key, None)
-                self.complete_results.pop(query_key, None)
-                self.in_progress_queries.pop(query_key, None)
-                log_with_context(outer_stream_lit, {"event": "Cleaned up internal state", "query_key": query_key}, source=undecided_lit, request_id=request_id)
\ No newline at end of file
+                    log_with_context(outer_stream_lit, {"event": "Not saving results - streaming incomplete", "query_key": query_key}, source=undecided_lit, request_id=request_id)
+
+            self.partial_results.pop(query_key, None)
+            self.complete_results.pop(query_key, None)
+            self.in_flight.pop(query_key, None)
+            broadcast.close()
+            log_with_context(outer_stream_lit, {"event": "Cleaned up internal state", "query_key": query_key}, source=undecided_lit, request_id=request_id)
\ No newline at end of file
@@ -0,0 +1,80 @@
+from typing import Awaitable, Callable, Optional
+import hashlib
+import json
+import asyncio
+
+def normalise_query_key(query: str) -> str:
+    """
+    Sorted, lower cased and deduplicated genres of the query, so the same genres always share one key
+    """
+    return ",".join(sorted({genre.strip().lower() for genre in query.split(",") if genre.strip()}))
+
+def merged_stage_key(query_key: str, keys_flow: str) -> str:
+    """
+    Storage key of a stage merged from the genre units, kept apart from the stages of a run of the whole query
+    """
+    return f"merged:{query_key}_{keys_flow}"
+
+def units_fingerprint(results: list) -> str:
+    return hashlib.sha256(json.dumps(results, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+def _unique_by_url(items: list) -> list:
+    seen = set()
+    unique_items = []
+    for item in items:
+        url = item.get("url") if isinstance(item, dict) else None
+        if url is None or url not in seen:
+            seen.add(url)
+            unique_items.append(item)
+    return unique_items
+
+async def merge_stage_results(results: list, summarise_genre: Optional[Callable[[str, list[dict]], Awaitable[str]]] = None):
+    """
+    Merges the stored results of one stage computed for separate genre units into the shape of a single run.
+    Article lists are concatenated without repeated urls, the per genre dictionaries are merged key by key.
+    Every unit classifies into the full genre list, a genre several units found with different articles
+    is summarised again by summarise_genre over all its articles, so each genre keeps one summary.
+    Without summarise_genre the summary of the unit with the most articles of the genre stands
+    """
+    if all(isinstance(result, list) for result in results):
+        return _unique_by_url([item for result in results for item in result])
+
+    first = results[0]
+    if "categories" in first:
+        categories = {}
+        for result in results:
+            for genre, articles in result["categories"].items():
+                categories[genre] = categories.get(genre, []) + articles
+        return {**first, "categories": {genre: _unique_by_url(articles) for genre, articles in categories.items()}}
+
+    if "results" in first:
+        return {**first,
+                "query": "; ".join(result.get("query", "") for result in results),
+                "results": _unique_by_url([item for result in results for item in result["results"]])}
+
+    # Final summaries keyed by genre, a unit whose articles cover the merged ones keeps its summary
+    by_genre = {}
+    for result in results:
+        for genre, genre_summary in result.items():
+            by_genre.setdefault(genre, []).append(genre_summary)
+
+    merged = {}
+    to_summarise = []
+    for genre, genre_summaries in by_genre.items():
+        all_summary = _unique_by_url([item for genre_summary in genre_summaries for item in genre_summary["all_summary"]])
+        largest = max(genre_summaries, key=lambda genre_summary: len(_unique_by_url(genre_summary["all_summary"])))
+        merged[genre] = {"final_summary": largest["final_summary"], "all_summary": all_summary}
+        if len(_unique_by_url(largest["all_summary"])) < len(all_summary):
+            to_summarise.append(genre)
+
+    if summarise_genre is None:
+        return merged
+    final_summaries = await asyncio.gather(*[summarise_genre(genre, merged[genre]["all_summary"]) for genre in to_summarise],
+                                           return_exceptions=True)
+    for genre, final_summary in zip(to_summarise, final_summaries):
+        if isinstance(final_summary, Exception):
+            # The summary of the unit with the most articles of the genre stands in
+            print(f"Exception while summarising the merged genre {genre} {str(final_summary)}")
+            continue
+        merged[genre]["final_summary"] = final_summary
+    return merged
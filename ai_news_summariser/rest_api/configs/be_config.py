@@ -13,11 +13,20 @@ class MongoConfig(BaseModel):
     port: int
     row_expiry: int
     is_active: bool
+    max_pool_size: int = 100
+    min_pool_size: int = 0
+    max_idle_time_ms: int | None = None
+    wait_queue_timeout_ms: int | None = None
+    server_selection_timeout_ms: int = 30000
+    connect_timeout_ms: int = 20000
+    socket_timeout_ms: int | None = None
 
 
 class LocalStorageConfig(BaseModel):
     row_expiry: int
     is_active: bool
+    max_entries: int = 10000
+    max_bytes: int = 256 * 1024 * 1024
 
 
 class StorageConfig(BaseModel):
@@ -35,6 +44,11 @@ class ConfigModel(BaseModel):
     storage: StorageConfig
     stream_sequence: List[str]
     stream_events: Dict[str, str]
+    stream_custom_events: List[str] = []
+    stream_article_events: Dict[str, str] = {}
+    cache_replay_delay_seconds: float = 0
+    subscriber_buffer_size: int = 256
+    per_genre_units: bool = False
     server_config: ServerConfig
     log_expiry: LogExpiryModel
 
@@ -4,5 +4,7 @@ from datetime import datetime, timezone
 
 class NewsSummaryResult(BaseModel):
     genre: str = Field(..., description="List of genres separated by comma")
+    query_key: str | None = Field(None, description="Normalised query the stage result belongs to")
     result: dict | list = Field(..., description="News results")
+    units_fingerprint: str | None = Field(None, description="Fingerprint of the genre unit results a merged stage was built from")
     createdAt: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
\ No newline at end of file
@@ -1,61 +1,118 @@
-from datetime import datetime, timedelta, timezone
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import timedelta
 from rest_api.models import NewsSummaryResult
 from .storage_facade import StorageInterface
-import asyncio
+import heapq
+import itertools
+import time
+
+@dataclass
+class _Entry:
+    value: NewsSummaryResult
+    query_key: str
+    expires_at: float
+    size_bytes: int
 
 class InMemoryStorage(StorageInterface):
-    def __init__(self, ttl_minutes: int = 10):
-        self.db = {}  # key: genre, value: (NewsSummaryResult, expiry_time)
+    """
+    Stage results kept in process, indexed for constant or logarithmic time operations.
+
+    Entries sit in LRU order bounded by max_entries and max_bytes (approximated by the JSON size of each document),
+    a query key index finds the stages of a query without scanning, and an expiry min-heap drops the expired
+    entries lazily. No operation awaits, so the event loop needs no lock around them
+    """
+    def __init__(self, ttl_minutes: int = 10, max_entries: int = 10000, max_bytes: int = 256 * 1024 * 1024):
         self.ttl = timedelta(minutes=ttl_minutes)
-        self.lock = asyncio.Lock()  # Lock for thread/task safety
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max(1, max_bytes)
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()  # key: genre, least recently used first
+        self._by_query: dict[str, set[str]] = {}
+        self._expiry_heap: list[tuple[float, int, str]] = []
+        self._sequence = itertools.count()
+        self._bytes = 0
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "evicted": 0}
 
     async def setup(self, config):
         pass
 
-    async def _cleanup_expired(self):
-        """Removes expired entries from the in-memory store."""
-        now = datetime.now(timezone.utc)
-        async with self.lock:
-            expired_keys = [k for k, (_, exp_time) in self.db.items() if exp_time <= now]
-            for k in expired_keys:
-                del self.db[k]
-            if expired_keys:
-                print(f"[Cleanup] Expired {len(expired_keys)} entries.")
+    def stats(self) -> dict:
+        return {**self._stats, "entries": len(self._entries), "bytes": self._bytes}
+
+    def _remove(self, key: str) -> _Entry:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size_bytes
+        keys = self._by_query.get(entry.query_key)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_query[entry.query_key]
+        return entry
+
+    def _cleanup_expired(self):
+        """Pops the expired entries off the expiry heap, skipping heap items of entries already replaced or removed."""
+        now = time.monotonic()
+        expired = 0
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            expires_at, _, key = heapq.heappop(self._expiry_heap)
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at == expires_at:
+                self._remove(key)
+                expired += 1
+        if expired:
+            self._stats["expired"] += expired
+            print(f"[Cleanup] Expired {expired} entries.")
+
+    def _evict_over_bounds(self):
+        evicted = 0
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            self._remove(next(iter(self._entries)))
+            evicted += 1
+        if evicted:
+            self._stats["evicted"] += evicted
+            print(f"[Eviction] Evicted {evicted} least recently used entries, storage stats {self.stats()}")
 
     async def get_all_documents_count(self, query: str) -> int:
-        await self._cleanup_expired()
-        query_lower = query.lower()
-        async with self.lock:
-            return len([
-                v for k, (v, _) in self.db.items()
-                if query_lower in k.lower()
-            ])
+        self._cleanup_expired()
+        return len(self._by_query.get(query, ()))
 
     async def cleanup(self, query: str):
-        await self._cleanup_expired()
-        query_lower = query.lower()
-        async with self.lock:
-            to_delete = [k for k in self.db if query_lower in k.lower()]
-            for k in to_delete:
-                del self.db[k]
-            print(f"Deleted {len(to_delete)} documents.")
-            return len(to_delete)
+        self._cleanup_expired()
+        to_delete = list(self._by_query.get(query, ()))
+        for key in to_delete:
+            self._remove(key)
+        print(f"Deleted {len(to_delete)} documents.")
+        return len(to_delete)
 
     async def get_document(self, query: str):
-        await self._cleanup_expired()
-        async with self.lock:
-            item = self.db.get(query)
-            if item:
-                value, exp_time = item
-                if exp_time > datetime.now(timezone.utc):
-                    return value
+        self._cleanup_expired()
+        entry = self._entries.get(query)
+        if entry:
+            self._entries.move_to_end(query)
+            self._stats["hits"] += 1
+            return entry.value
+        self._stats["misses"] += 1
         print(f"No document found for genre: {query}")
         return None
 
     async def insert_document(self, news_summary: NewsSummaryResult):
-        await self._cleanup_expired()
-        expiry_time = datetime.now(timezone.utc) + self.ttl
-        async with self.lock:
-            self.db[news_summary.genre] = (news_summary, expiry_time)
+        self._cleanup_expired()
+        key = news_summary.genre
+        if key in self._entries:
+            self._remove(key)
+
+        entry = _Entry(value=news_summary,
+                       query_key=news_summary.query_key or key,
+                       expires_at=time.monotonic() + self.ttl.total_seconds(),
+                       size_bytes=len(news_summary.model_dump_json()))
+        self._entries[key] = entry
+        self._by_query.setdefault(entry.query_key, set()).add(key)
+        self._bytes += entry.size_bytes
+        heapq.heappush(self._expiry_heap, (entry.expires_at, next(self._sequence), key))
+        self._evict_over_bounds()
+        if len(self._expiry_heap) > 2 * len(self._entries) + 64:
+            # Replaced and evicted entries leave stale heap items, rebuilding keeps the heap proportional to the entries
+            self._expiry_heap = [(entry.expires_at, next(self._sequence), key) for key, entry in self._entries.items()]
+            heapq.heapify(self._expiry_heap)
         print(f"Inserted document in-memory with TTL of {self.ttl}.")
         return "Inserted Successfully"
@@ -1,8 +1,14 @@
 from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import UpdateOne
 from pymongo.errors import PyMongoError
 from pydantic import ValidationError
 from rest_api.models import NewsSummaryResult
 from .storage_facade import StorageInterface
+import re
+
+def _query_filter(query: str) -> dict:
+    # Stage documents are keyed {query_key}_{stage}: an anchored, case sensitive prefix is a range scan of the unique genre index
+    return {"genre": {"$regex": f"^{re.escape(query)}_"}}
 
 class MongoDBStorage(StorageInterface):
     def __init__(self, collection: AsyncIOMotorCollection):
@@ -19,15 +25,15 @@ class MongoDBStorage(StorageInterface):
 
     async def get_all_documents_count(self, query: str) -> int:
         try:
-            cursor = self.collection.find({"genre": {"$regex": query, "$options": "i"}})
-            documents = await cursor.to_list(length=None)
-            return len(documents)
+            # Counted on the server from the index, no document is sent back
+            return await self.collection.count_documents(_query_filter(query))
         except Exception as e:
             print(f"Exception in get_all_documents {str(e)}")
+            return 0
 
     async def cleanup(self, query: str):
         try:
-            result = await self.collection.delete_many({"genre": {"$regex": query, "$options": "i"}})
+            result = await self.collection.delete_many(_query_filter(query))
             print(f"Deleted {result.deleted_count} documents.")
             return result.deleted_count
         except Exception as e:
@@ -36,7 +42,7 @@ class MongoDBStorage(StorageInterface):
 
     async def get_document(self, query: str):
         try:
-            document = await self.collection.find_one({"genre": query})
+            document = await self.collection.find_one({"genre": query}, projection={"_id": 0})
             if document:
                 document.pop("_id", None)
                 return NewsSummaryResult(**document)
@@ -68,3 +74,23 @@ class MongoDBStorage(StorageInterface):
         except Exception as e:
             print(f"Unexpected error during insert: {e}")
         return None
+
+    async def insert_documents(self, news_summaries: list[NewsSummaryResult]):
+        """
+        Upserts all the stage results of a run in one unordered bulk write
+        """
+        if not news_summaries:
+            return None
+        try:
+            result = await self.collection.bulk_write(
+                [UpdateOne({"genre": news_summary.genre}, {"$set": news_summary.model_dump()}, upsert=True)
+                 for news_summary in news_summaries],
+                ordered=False
+            )
+            print(f"Bulk upserted {result.upserted_count + result.modified_count} documents")
+            return "Inserted Successfully"
+        except PyMongoError as e:
+            print(f"MongoDB Bulk Insert Error: {e}")
+        except Exception as e:
+            print(f"Unexpected error during bulk insert: {e}")
+        return None
@@ -22,3 +22,10 @@ class StorageInterface(ABC):
     @abstractmethod
     async def setup(self, config):
         pass
+
+    async def insert_documents(self, news_summaries: list[NewsSummaryResult]):
+        for news_summary in news_summaries:
+            await self.insert_document(news_summary)
+
+    def stats(self) -> dict:
+        return {}
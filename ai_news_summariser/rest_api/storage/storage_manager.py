@@ -21,21 +21,34 @@ class StorageManager:
                 print(f"Starting mongo at {mongodb_config.url}:{mongodb_config.port}")
                 # MongoDB setup
                 MONGO_DETAILS = f"{mongodb_config.url}:{mongodb_config.port}"
-                client = AsyncIOMotorClient(MONGO_DETAILS)
+                client = AsyncIOMotorClient(MONGO_DETAILS,
+                                            maxPoolSize=mongodb_config.max_pool_size,
+                                            minPoolSize=mongodb_config.min_pool_size,
+                                            maxIdleTimeMS=mongodb_config.max_idle_time_ms,
+                                            waitQueueTimeoutMS=mongodb_config.wait_queue_timeout_ms,
+                                            serverSelectionTimeoutMS=mongodb_config.server_selection_timeout_ms,
+                                            connectTimeoutMS=mongodb_config.connect_timeout_ms,
+                                            socketTimeoutMS=mongodb_config.socket_timeout_ms)
                 db = client.news_summary_db
                 collection = db.news_summary
                 cls._instance = MongoDBStorage(collection)
             except Exception as e:
                 print(f"Failed to init the mongoDB - {str(e)}")
-                storage_config = be_config.storage.local
-                cls._instance = InMemoryStorage(ttl_minutes=storage_config.row_expiry)
+                cls._instance = cls._in_memory_storage()
         else:
-            storage_config = be_config.storage.local
-            cls._instance = InMemoryStorage(ttl_minutes=storage_config.row_expiry)
+            cls._instance = cls._in_memory_storage()
+
+    @staticmethod
+    def _in_memory_storage() -> InMemoryStorage:
+        storage_config = be_config.storage.local
+        return InMemoryStorage(ttl_minutes=storage_config.row_expiry,
+                               max_entries=storage_config.max_entries,
+                               max_bytes=storage_config.max_bytes)
 
     @classmethod
     async def startup_setup(cls):
-        await cls._get_instance().setup(be_config.active_storage)
+        active_storage = be_config.active_storage
+        await cls._get_instance().setup(next(iter(active_storage.values())) if active_storage else None)
 
     @classmethod
     def _get_instance(cls) -> StorageInterface:
@@ -47,6 +60,10 @@ class StorageManager:
     async def insert_document(cls, news_summary: NewsSummaryResult):
         return await cls._get_instance().insert_document(news_summary)
 
+    @classmethod
+    async def insert_documents(cls, news_summaries: list[NewsSummaryResult]):
+        return await cls._get_instance().insert_documents(news_summaries)
+
     @classmethod
     async def get_document(cls, query: str):
         return await cls._get_instance().get_document(query)
@@ -58,3 +75,7 @@ class StorageManager:
     @classmethod
     async def cleanup(cls, query: str):
         return await cls._get_instance().cleanup(query)
+
+    @classmethod
+    def stats(cls) -> dict:
+        return cls._get_instance().stats()